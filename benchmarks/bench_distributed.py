@@ -0,0 +1,197 @@
+"""
+Run the distributed scraping mode end to end against a local stub server.
+
+Serves synthetic profile timelines over HTTP, scrapes them with one worker
+and then with several worker processes sharing a SQLite queue (killing one
+of them mid-run to exercise lease expiry), merges the per-profile outputs
+and checks the result, the streaming ``merge`` command, the snapshot store
+the workers share and a second round on the same queue with ``--requeue``:
+
+    python benchmarks/bench_distributed.py --profiles 60 --workers 4
+"""
+import argparse
+import json
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from distributed.merge import merge_exports  # noqa: E402
+from distributed.work_queue import WorkQueue  # noqa: E402
+from extractors.twitter_parser import tweet_sort_key  # noqa: E402
+from outputs.snapshot_store import SnapshotStore  # noqa: E402
+
+def make_timeline(screen_name: str, n_tweets: int) -> Dict[str, Any]:
+    rng = random.Random(screen_name)
+    start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    tweets = []
+    for _ in range(n_tweets):
+        created = start + timedelta(seconds=rng.randrange(30 * 86400))
+        tweets.append({
+            "id_str": str(rng.getrandbits(62)),
+            "created_at": created.strftime("%a %b %d %H:%M:%S +0000 %Y"),
+            "full_text": f"tweet from {screen_name}",
+            "favorite_count": rng.randint(0, 500),
+            "retweet_count": rng.randint(0, 50),
+            "reply_count": rng.randint(0, 20),
+            "user": {"name": screen_name, "screen_name": screen_name, "followers_count": 1000},
+        })
+    return {"tweets": tweets}
+
+class StubTimelineServer(ThreadingHTTPServer):
+    """Serves make_timeline() output; the first request per profile in ``flaky`` gets a 503."""
+
+    daemon_threads = True
+
+    def __init__(self, tweets_per_profile: int, latency: float, flaky: set) -> None:
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.tweets_per_profile = tweets_per_profile
+        self.latency = latency
+        self.flaky = set(flaky)
+        self.lock = threading.Lock()
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802
+        screen_name = parse_qs(urlparse(self.path).query).get("screen_name", [""])[0]
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            fail = screen_name in self.server.flaky
+            self.server.flaky.discard(screen_name)
+        if fail:
+            self.send_error(503)
+            return
+
+        body = json.dumps(make_timeline(screen_name, self.server.tweets_per_profile)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+def start_workers(queue_path: Path, workers: int, endpoint: str, workdir: Path, kill_one: bool) -> float:
+    cmd = [
+        sys.executable, str(SRC / "main.py"), "worker",
+        "--queue", str(queue_path),
+        "--output-dir", str(workdir / "out"),
+        "--snapshot-dir", str(workdir / "snapshots"),
+        "--since-date", "2000-01-01",
+        "--endpoint", endpoint,
+        "--lease", "3",
+        "--poll-interval", "0.2",
+        "--log-level", "WARNING",
+    ]
+    started = time.perf_counter()
+    procs = [subprocess.Popen(cmd) for _ in range(workers)]
+    if kill_one:
+        time.sleep(1.0)
+        procs[0].send_signal(signal.SIGKILL)
+    for proc in procs:
+        proc.wait()
+    return time.perf_counter() - started
+
+def run_workers(
+    handles: List[str],
+    workers: int,
+    endpoint: str,
+    workdir: Path,
+    kill_one: bool,
+) -> float:
+    queue_path = workdir / "queue.sqlite"
+    with WorkQueue(queue_path) as queue:
+        added = queue.enqueue([f"https://twitter.com/{h}" for h in handles] + ["not a url", "https://example.com/x"])
+    assert added == len(handles), added
+
+    elapsed = start_workers(queue_path, workers, endpoint, workdir, kill_one)
+    with WorkQueue(queue_path) as queue:
+        counts = queue.counts()
+    assert counts["done"] == len(handles), counts
+    return elapsed
+
+def check_requeue(handles: List[str], workers: int, endpoint: str, workdir: Path) -> None:
+    """A second round on the same queue file needs --requeue and records a second sample per tweet."""
+    queue_path = workdir / "queue.sqlite"
+    before = len(SnapshotStore(workdir / "snapshots"))
+    urls = [f"https://twitter.com/{h}" for h in handles]
+    with WorkQueue(queue_path) as queue:
+        assert queue.enqueue(urls) == 0
+        assert queue.enqueue(urls, requeue=True) == len(handles)
+    start_workers(queue_path, workers, endpoint, workdir, kill_one=False)
+    with WorkQueue(queue_path) as queue:
+        assert queue.counts()["done"] == len(handles), queue.counts()
+    assert len(SnapshotStore(workdir / "snapshots")) >= 2 * before >= 2
+
+def check_merge_cli(workdir: Path) -> None:
+    """The streaming JSON merge writes the same tweets as merge_exports."""
+    output = workdir / "merged.json"
+    subprocess.run(
+        [sys.executable, str(SRC / "main.py"), "merge", str(workdir / "out"), str(workdir / "out"),
+         "--output", str(output), "--log-level", "WARNING"],
+        check=True,
+    )
+    with output.open("r", encoding="utf-8") as f:
+        assert json.load(f) == merge_exports([workdir / "out"])
+
+def check_merged(workdir: Path, handles: List[str], tweets_per_profile: int) -> int:
+    merged = merge_exports([workdir / "out"])
+    keys = [tweet_sort_key(t) for t in merged]
+    assert all(a >= b for a, b in zip(keys, keys[1:])), "merge output is not newest first"
+    assert {t["_source_profile"] for t in merged} == set(handles)
+    assert len(merged) == len(handles) * tweets_per_profile, len(merged)
+    # Every tweet appears twice in the inputs here; the merge keeps one copy.
+    assert len(merge_exports([workdir / "out", workdir / "out"])) == len(merged)
+
+    store = SnapshotStore(workdir / "snapshots")
+    assert len(store) >= len(merged), len(store)
+    assert np.all(np.diff(store.scan().scraped_at.astype(np.int64)) >= 0), "snapshots out of order"
+    return len(merged)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--tweets", type=int, default=50, help="Tweets per profile.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub response delay in seconds.")
+    args = parser.parse_args()
+
+    handles = [f"user{i:04d}" for i in range(args.profiles)]
+    server = StubTimelineServer(args.tweets, args.latency, flaky=set(handles[::10]))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/timeline/profile"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        single_dir = Path(tmp) / "single"
+        single_s = run_workers(handles, 1, endpoint, single_dir, kill_one=False)
+        check_merged(single_dir, handles, args.tweets)
+
+        server.flaky = set(handles[::10])
+        multi_dir = Path(tmp) / "multi"
+        multi_s = run_workers(handles, args.workers, endpoint, multi_dir, kill_one=args.workers > 1)
+        total = check_merged(multi_dir, handles, args.tweets)
+        check_merge_cli(multi_dir)
+        check_requeue(handles, args.workers, endpoint, multi_dir)
+
+    server.shutdown()
+    print(f"profiles               : {args.profiles} ({total:,} tweets merged)")
+    print(f"1 worker               : {single_s:8.3f}s")
+    label = f"{args.workers} workers" + (" (1 killed)" if args.workers > 1 else "")
+    print(f"{label:<23}: {multi_s:8.3f}s")
+    print(f"speedup                : {single_s / multi_s:8.1f}x (all profiles done, merge in order)")
+
+if __name__ == "__main__":
+    main()
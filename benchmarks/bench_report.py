@@ -0,0 +1,285 @@
+"""
+Benchmark the vectorized engagement report against a naive per-row baseline.
+
+Generates synthetic tweets shaped like the JSON exporter output and runs
+three stages:
+
+1. Correctness and speedup on ``--rows`` tweets: both implementations build
+   the per-profile and per-day reports, every output column is compared,
+   and timestamp parsing is timed separately from the aggregation.
+2. The real ``load_export_json`` path on a ``--load-rows`` JSON file,
+   split into ``json.load`` and conversion into column arrays.
+3. Aggregation alone over ``--agg-rows`` synthetic column arrays.
+
+    python benchmarks/bench_report.py --rows 50000 --load-rows 1000000 --agg-rows 20000000
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from analytics.engagement_report import (  # noqa: E402
+    TweetColumns,
+    _float_column,
+    _int_column,
+    build_daily_report,
+    build_profile_report,
+    columns_from_rows,
+    daily_report_columns,
+    load_export_json,
+    parse_created_at_column,
+    profile_report_columns,
+)
+
+TWITTER_TS_FORMAT = "%a %b %d %H:%M:%S %z %Y"
+
+def make_rows(n_rows: int, n_profiles: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    followers = [rng.randint(0, 2_000_000) for _ in range(n_profiles)]
+    rows: List[Dict[str, Any]] = []
+    for _ in range(n_rows):
+        p = rng.randrange(n_profiles)
+        created = start + timedelta(seconds=rng.randrange(90 * 86400))
+        rows.append({
+            "bookmark_count": rng.randint(0, 50),
+            "created_at": created.strftime("%a %b %d %H:%M:%S +0000 %Y"),
+            "favorite_count": int(rng.paretovariate(1.2)),
+            "reply_count": rng.randint(0, 40),
+            "retweet_count": int(rng.paretovariate(1.5)),
+            "views_count": rng.randint(0, 500_000) if rng.random() > 0.1 else None,
+            "user": {"screen_name": f"user{p}", "followers_count": followers[p]},
+            "_source_profile": f"user{p}",
+        })
+    return rows
+
+def make_columns(n_rows: int, n_profiles: int, seed: int = 0) -> TweetColumns:
+    rng = np.random.default_rng(seed)
+    codes = rng.integers(0, n_profiles, n_rows)
+    views = rng.integers(0, 500_000, n_rows).astype(np.float64)
+    views[rng.random(n_rows) < 0.1] = np.nan
+    return TweetColumns(
+        profiles=[f"user{i}" for i in range(n_profiles)],
+        profile_codes=codes,
+        created_ts=rng.integers(1_704_067_200, 1_704_067_200 + 90 * 86400, n_rows),
+        favorite_count=rng.pareto(1.2, n_rows).astype(np.int64),
+        retweet_count=rng.pareto(1.5, n_rows).astype(np.int64),
+        reply_count=rng.integers(0, 40, n_rows),
+        views_count=views,
+        followers_count=rng.integers(0, 2_000_000, n_profiles)[codes].astype(np.float64),
+    )
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return math.nan
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo = math.floor(pos)
+    hi = math.ceil(pos)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+def _mean(values: List[float]) -> float:
+    return sum(values) / len(values) if values else math.nan
+
+def _rate(row: Dict[str, Any]) -> float:
+    followers = (row.get("user") or {}).get("followers_count")
+    if not followers:
+        return math.nan
+    return (row["favorite_count"] + row["retweet_count"] + row["reply_count"]) / followers * 100.0
+
+def naive_parse(rows: List[Dict[str, Any]]) -> List[int]:
+    """Per-row strptime, the cheapest per-row parser for the Twitter layout."""
+    return [int(datetime.strptime(row["created_at"], TWITTER_TS_FORMAT).timestamp()) for row in rows]
+
+def naive_profile_report(
+    rows: List[Dict[str, Any]],
+    ts: List[int],
+    percentile: float,
+) -> Dict[str, Dict[str, float]]:
+    groups: Dict[str, Dict[str, list]] = defaultdict(lambda: defaultdict(list))
+    for row, created in zip(rows, ts):
+        user = row.get("user") or {}
+        g = groups[row.get("_source_profile") or user.get("screen_name") or ""]
+        g["ts"].append(created)
+        g["fav"].append(row["favorite_count"])
+        g["rt"].append(row["retweet_count"])
+        if row.get("views_count") is not None:
+            g["views"].append(row["views_count"])
+        if user.get("followers_count") is not None:
+            g["followers"].append(user["followers_count"])
+        rate = _rate(row)
+        if not math.isnan(rate):
+            g["rate"].append(rate)
+
+    p = f"p{percentile:g}"
+    out: Dict[str, Dict[str, float]] = {}
+    for name, g in groups.items():
+        fav = sorted(g["fav"])
+        rt = sorted(g["rt"])
+        ts_sorted = sorted(g["ts"])
+        gaps = sorted((b - a) / 3600.0 for a, b in zip(ts_sorted, ts_sorted[1:]))
+        span_days = max((ts_sorted[-1] - ts_sorted[0]) / 86400, 1.0)
+        out[name] = {
+            "tweets": len(ts_sorted),
+            "followers_count": max(g["followers"]) if g["followers"] else math.nan,
+            "favorite_median": _percentile(fav, 50),
+            f"favorite_{p}": _percentile(fav, percentile),
+            "retweet_median": _percentile(rt, 50),
+            f"retweet_{p}": _percentile(rt, percentile),
+            "views_median": _percentile(sorted(g["views"]), 50),
+            "engagement_rate_pct": _mean(g["rate"]),
+            "tweets_per_day": len(ts_sorted) / span_days,
+            "median_gap_hours": _percentile(gaps, 50),
+        }
+    return out
+
+def naive_daily_report(
+    rows: List[Dict[str, Any]],
+    ts: List[int],
+    percentile: float,
+    window: int,
+) -> Dict[str, Dict[str, float]]:
+    days: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for row, created in zip(rows, ts):
+        days[created // 86400].append(row)
+
+    p = f"p{percentile:g}"
+    out: Dict[str, Dict[str, float]] = {}
+    for day, day_rows in days.items():
+        fav = sorted(r["favorite_count"] for r in day_rows)
+        rt = sorted(r["retweet_count"] for r in day_rows)
+        rates = [x for x in (_rate(r) for r in day_rows) if not math.isnan(x)]
+        in_window = [r for d in range(day - window + 1, day + 1) for r in days.get(d, [])]
+        label = datetime.fromtimestamp(day * 86400, tz=timezone.utc).strftime("%Y-%m-%d")
+        out[label] = {
+            "tweets": len(day_rows),
+            "favorite_median": _percentile(fav, 50),
+            f"favorite_{p}": _percentile(fav, percentile),
+            "retweet_median": _percentile(rt, 50),
+            f"retweet_{p}": _percentile(rt, percentile),
+            "engagement_rate_pct": _mean(rates),
+            f"tweets_{window}d": len(in_window),
+            f"favorite_avg_{window}d": _mean([r["favorite_count"] for r in in_window]),
+            f"retweet_avg_{window}d": _mean([r["retweet_count"] for r in in_window]),
+        }
+    return out
+
+def _same(a: float, b: float) -> bool:
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+def check_report(got: List[Dict[str, Any]], expected: Dict[str, Dict[str, float]], columns: List[str]) -> None:
+    label = columns[0]
+    assert len(got) == len(expected), (len(got), len(expected))
+    for row in got:
+        want = expected[row[label]]
+        assert set(want) == set(columns[1:]), sorted(set(columns[1:]) ^ set(want))
+        for key in columns[1:]:
+            assert _same(float(want[key]), float(row[key])), (row[label], key, want[key], row[key])
+
+def check_cell_conversion() -> None:
+    """A cell converts the same way whatever else is in its column."""
+    odd = [7, None, True, "12", "1e3", "inf", 2.5, float("nan"), 10 ** 30, -(10 ** 30), {"x": 1}]
+    for convert in (_int_column, _float_column):
+        column = convert(odd)
+        for value, got in zip(odd, column):
+            alone = convert([value])[0]
+            assert alone == got or (np.isnan(alone) and np.isnan(got)), (convert.__name__, value, alone, got)
+
+def bench_correctness(args: argparse.Namespace) -> None:
+    print(f"[1] {args.rows:,} tweets across {args.profiles:,} profiles, every report column compared")
+    rows = make_rows(args.rows, args.profiles)
+
+    t0 = time.perf_counter()
+    ts = naive_parse(rows)
+    naive_parse_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    expected_profiles = naive_profile_report(rows, ts, args.percentile)
+    expected_days = naive_daily_report(rows, ts, args.percentile, args.window)
+    naive_agg_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    parse_created_at_column([row["created_at"] for row in rows])
+    vec_parse_s = time.perf_counter() - t0
+    cols = columns_from_rows(rows)
+    t0 = time.perf_counter()
+    profiles = build_profile_report(cols, args.percentile)
+    days = build_daily_report(cols, args.percentile, args.window)
+    vec_agg_s = time.perf_counter() - t0
+
+    assert np.array_equal(cols.created_ts, np.asarray(ts)), "timestamp parsers disagree"
+    check_report(profiles, expected_profiles, profile_report_columns(args.percentile))
+    check_report(days, expected_days, daily_report_columns(args.percentile, args.window))
+
+    print(f"    timestamps   naive {naive_parse_s:8.3f}s  vectorized {vec_parse_s:8.3f}s"
+          f"  ({naive_parse_s / vec_parse_s:6.1f}x)")
+    print(f"    aggregation  naive {naive_agg_s:8.3f}s  vectorized {vec_agg_s:8.3f}s"
+          f"  ({naive_agg_s / vec_agg_s:6.1f}x)")
+
+def bench_load(args: argparse.Namespace) -> None:
+    print(f"[2] load_export_json on a {args.load_rows:,}-tweet JSON export")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "export.json"
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(make_rows(args.load_rows, args.profiles, seed=1), f)
+        size_mb = path.stat().st_size / 1e6
+
+        t0 = time.perf_counter()
+        with path.open("r", encoding="utf-8") as f:
+            rows = json.load(f)
+        decode_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        columns_from_rows(rows)
+        convert_s = time.perf_counter() - t0
+        del rows
+
+        t0 = time.perf_counter()
+        cols = load_export_json([path])
+        total_s = time.perf_counter() - t0
+        assert len(cols) == args.load_rows
+
+    per_million = total_s / args.load_rows * 1e6
+    print(f"    {size_mb:,.0f} MB: json.load {decode_s:.3f}s + columns {convert_s:.3f}s;"
+          f" end to end {total_s:.3f}s ({per_million:.1f}s per million tweets)")
+
+def bench_aggregate(args: argparse.Namespace) -> None:
+    print(f"[3] aggregation over {args.agg_rows:,} rows of column arrays")
+    cols = make_columns(args.agg_rows, args.profiles * 10)
+    t0 = time.perf_counter()
+    build_profile_report(cols, args.percentile)
+    profile_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    build_daily_report(cols, args.percentile, args.window)
+    daily_s = time.perf_counter() - t0
+    print(f"    per-profile {profile_s:.3f}s, per-day {daily_s:.3f}s")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--load-rows", type=int, default=1_000_000)
+    parser.add_argument("--agg-rows", type=int, default=20_000_000)
+    parser.add_argument("--profiles", type=int, default=500)
+    parser.add_argument("--percentile", type=float, default=90.0)
+    parser.add_argument("--window", type=int, default=7)
+    args = parser.parse_args()
+
+    check_cell_conversion()
+    bench_correctness(args)
+    if args.load_rows:
+        bench_load(args)
+    if args.agg_rows:
+        bench_aggregate(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Check and benchmark the columnar engagement snapshot store.
+
+Runs correctness checks (history and range scans against a plain Python
+model across several segments, recovery from an interrupted append,
+read-only reads, a reader and a writer sharing one store) and then appends
+``--scrapes`` snapshots of ``--tweets`` tweets, comparing the disk
+footprint with keeping one JSON export per scrape:
+
+    python benchmarks/bench_snapshot_store.py --tweets 2000 --scrapes 200
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from outputs.snapshot_store import COUNTER_FIELDS, EngagementHistory, SnapshotStore  # noqa: E402
+
+START = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+Sample = Tuple[int, int, Dict[str, Optional[int]]]
+
+def make_snapshot(ids: List[int], scrape: int, rng: random.Random) -> List[Dict[str, Any]]:
+    return [{
+        "id_str": str(tweet_id),
+        "conversation_id_str": "1",
+        "created_at": "Fri Mar 01 00:00:00 +0000 2024",
+        "full_text": "synthetic tweet",
+        "favorite_count": scrape * 40 + rng.randint(0, 40),
+        "retweet_count": scrape * 5 + rng.randint(0, 5),
+        "reply_count": scrape * 2 + rng.randint(0, 2),
+        "bookmark_count": scrape,
+        "views_count": scrape * 3000 + rng.randint(0, 3000) if rng.random() > 0.1 else None,
+        "user": {"screen_name": "user", "followers_count": 1000},
+    } for tweet_id in ids]
+
+def make_wild_snapshot(ids: List[int], rng: random.Random) -> List[Dict[str, Any]]:
+    """Counters that jump, drop and go missing, to exercise every delta width."""
+    def counter(limit: int) -> int:
+        return rng.choice([0, rng.randint(0, 200), rng.randint(0, 70_000), rng.randint(0, limit)])
+
+    return [{
+        "id_str": str(tweet_id),
+        "favorite_count": counter(2 ** 32 - 1),
+        "retweet_count": counter(2 ** 20),
+        "reply_count": counter(300),
+        "bookmark_count": counter(2 ** 32 - 1),
+        "views_count": counter(2 ** 62 - 1) if rng.random() > 0.3 else None,
+    } for tweet_id in ids]
+
+def store_bytes(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.iterdir() if p.is_file())
+
+def store_files(path: Path) -> Dict[str, Tuple[int, int]]:
+    return {p.name: (p.stat().st_size, p.stat().st_mtime_ns) for p in path.iterdir()}
+
+def check_history(got: EngagementHistory, want: List[Sample]) -> None:
+    assert len(got) == len(want), (len(got), len(want))
+    for i, (tweet_id, ts, counters) in enumerate(want):
+        assert int(got.tweet_id[i]) == tweet_id, (i, got.tweet_id[i], tweet_id)
+        assert int(got.scraped_at[i]) == ts, (tweet_id, got.scraped_at[i], ts)
+        for name in COUNTER_FIELDS:
+            value = float(getattr(got, name)[i])
+            expected = counters[name]
+            if expected is None:
+                assert math.isnan(value), (tweet_id, name, value)
+            else:
+                assert value == float(expected), (tweet_id, name, value, expected)
+
+def check_against_model(workdir: Path) -> None:
+    # A tiny segment size makes keyframes and segment boundaries frequent.
+    store = SnapshotStore(workdir / "model", segment_rows=150)
+    rng = random.Random(0)
+    pool = [2 ** 64 - 1 - i for i in range(40)] + [rng.getrandbits(63) for _ in range(40)]
+    samples: List[Sample] = []
+    for s in range(30):
+        ids = rng.sample(pool, rng.randint(1, 50))
+        ts = int((START + timedelta(hours=s // 2)).timestamp())
+        snapshot = make_wild_snapshot(ids, rng)
+        assert store.append(snapshot, datetime.fromtimestamp(ts, tz=timezone.utc)) == len(ids)
+        for row in sorted(snapshot, key=lambda r: int(r["id_str"])):
+            samples.append((int(row["id_str"]), ts, {name: row[name] for name in COUNTER_FIELDS}))
+
+    reader = SnapshotStore(workdir / "model")
+    for tweet_id in pool:
+        check_history(reader.history(tweet_id), [x for x in samples if x[0] == tweet_id])
+    assert len(reader.history(12345)) == 0
+
+    # Within one scrape the order of rows is the store's own; compare per scrape.
+    def by_scrape(items: List[Sample]) -> List[Sample]:
+        return sorted(items, key=lambda x: (x[1], x[0]))
+
+    hours = [START + timedelta(hours=h) for h in range(16)]
+    for start, end in [(None, None), (hours[3], hours[9]), (hours[0], hours[1]), (hours[14], None),
+                       (None, hours[0]), (hours[9], hours[3]), (hours[7], hours[7])]:
+        got = reader.scan(start, end)
+        lo = -math.inf if start is None else start.timestamp()
+        hi = math.inf if end is None else end.timestamp()
+        want = by_scrape([x for x in samples if lo <= x[1] < hi])
+        order = np.lexsort((got.tweet_id, got.scraped_at))
+        check_history(EngagementHistory(**{k: v[order] for k, v in vars(got).items()}), want)
+
+    # Rows without an id are skipped rather than merged under conversation_id_str.
+    assert store.append([{"conversation_id_str": "1", "favorite_count": 1}]) == 0
+    for bad in ({"id_str": "1", "favorite_count": -1}, {"id_str": "1", "favorite_count": 2 ** 32}):
+        try:
+            store.append([bad])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"out-of-range counter was accepted: {bad}")
+
+def check_reads_are_read_only(workdir: Path) -> None:
+    path = workdir / "read_only"
+    SnapshotStore(path).append(make_snapshot([1, 2, 3], 0, random.Random(1)), START)
+    (path / ".lock").unlink()
+    before = store_files(path)
+    store = SnapshotStore(path)
+    store.history(2)
+    store.scan()
+    store.scan(START, START + timedelta(hours=1))
+    assert store_files(path) == before, "a read changed the store"
+    assert len(SnapshotStore(workdir / "missing").history(1)) == 0
+    assert not (workdir / "missing").exists()
+
+def check_recovery(workdir: Path) -> None:
+    path = workdir / "recovery"
+    store = SnapshotStore(path)
+    rng = random.Random(2)
+    store.append(make_snapshot([1, 2], 0, rng), START)
+
+    # Simulate a crash after data was written but before meta.json was replaced.
+    data_files = [p for p in path.iterdir() if p.suffix in (".bin", ".delta") and not p.name.startswith("order.")]
+    sizes = {p.name: p.stat().st_size for p in data_files}
+    for p in data_files:
+        with p.open("ab") as f:
+            f.write(b"\xff" * 13)
+    (path / "tweets.2.npy").write_bytes(b"garbage")
+    assert len(SnapshotStore(path)) == 2
+    assert len(SnapshotStore(path).history(1)) == 1
+    assert len(SnapshotStore(path).scan()) == 2
+    assert (path / "codes.bin").stat().st_size == sizes["codes.bin"] + 13, "reader truncated"
+
+    SnapshotStore(path).append(make_snapshot([1, 2], 1, rng), START + timedelta(hours=1))
+    reopened = SnapshotStore(path)
+    assert len(reopened) == 4
+    assert (path / "codes.bin").stat().st_size == 4 * 4
+    assert reopened.history(2).scraped_at.tolist() == [int(START.timestamp()), int(START.timestamp()) + 3600]
+    assert sorted(p.name for p in path.glob("tweets.*.npy")) == ["tweets.1.npy", "tweets.2.npy"]
+
+    try:
+        reopened.append(make_snapshot([1], 2, rng), START)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("out-of-order append was accepted")
+
+def check_shared_store(workdir: Path) -> None:
+    path = workdir / "shared"
+    rng = random.Random(3)
+    reader = SnapshotStore(path)
+    reader.append(make_snapshot([1, 2], 0, rng), START)
+    assert len(reader.history(1)) == 1
+
+    writer = SnapshotStore(path)
+    writer.append(make_snapshot([1, 2], 1, rng), START + timedelta(hours=1))
+    # The reader opened before the append must see it and must not undo it.
+    assert len(reader.history(1)) == 2
+    reader.append(make_snapshot([1, 2], 2, rng), START + timedelta(hours=2))
+    writer.append(make_snapshot([2], 3, rng))
+    assert len(SnapshotStore(path)) == 7
+    assert len(SnapshotStore(path).history(2)) == 4
+
+def bench_footprint(args: argparse.Namespace, workdir: Path) -> None:
+    rng = random.Random(4)
+    ids = [rng.getrandbits(62) for _ in range(args.tweets)]
+    store = SnapshotStore(workdir / "bench")
+    json_bytes = 0
+    append_s = 0.0
+    for s in range(args.scrapes):
+        snapshot = make_snapshot(ids, s, rng)
+        json_bytes += len(json.dumps(snapshot, ensure_ascii=False, indent=2).encode("utf-8"))
+        t0 = time.perf_counter()
+        store.append(snapshot, START + timedelta(hours=s))
+        append_s += time.perf_counter() - t0
+
+    samples = args.tweets * args.scrapes
+    lookups = ids[:1000]
+    t0 = time.perf_counter()
+    for tweet_id in lookups:
+        store.history(tweet_id)
+    history_s = (time.perf_counter() - t0) / len(lookups)
+    t0 = time.perf_counter()
+    window = store.scan(START + timedelta(hours=args.scrapes // 4), START + timedelta(hours=args.scrapes // 2))
+    float(np.sum(window.favorite_count))
+    scan_s = time.perf_counter() - t0
+
+    disk = store_bytes(store.path)
+    print(f"samples               : {samples:,} ({args.tweets:,} tweets x {args.scrapes} scrapes)")
+    print(f"store on disk         : {disk:,} B ({disk / samples:.1f} B per sample, all files)")
+    print(f"JSON export per scrape: {json_bytes:,} B ({json_bytes / samples:.1f} B per sample,"
+          f" {json_bytes / disk:.1f}x larger)")
+    print(f"append                : {append_s / args.scrapes * 1000:.2f} ms per scrape")
+    print(f"history               : {history_s * 1e6:.1f} us per tweet")
+    print(f"scan                  : {scan_s * 1000:.2f} ms for {len(window):,} samples")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tweets", type=int, default=2000)
+    parser.add_argument("--scrapes", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        check_against_model(workdir)
+        check_reads_are_read_only(workdir)
+        check_recovery(workdir)
+        check_shared_store(workdir)
+        print("checks                : history/scan vs model, read-only reads, recovery, shared store OK")
+        bench_footprint(args, workdir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,490 @@
+import csv
+import json
+import logging
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from extractors.utils_date import parse_twitter_timestamp
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+
+# Layout of the canonical Twitter timestamp, e.g. "Wed Mar 06 10:00:39 +0000 2024".
+_TWITTER_TS_LEN = 30
+_TWITTER_TS_DIGITS = (8, 9, 11, 12, 14, 15, 17, 18, 21, 22, 23, 24, 26, 27, 28, 29)
+_TWITTER_TS_SPACES = (3, 7, 10, 19, 25)
+_TWITTER_TS_COLONS = (13, 16)
+_MONTH_ABBRS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+_MONTH_LOOKUP = sorted(
+    ((ord(m[0]) << 16) | (ord(m[1]) << 8) | ord(m[2]), i + 1) for i, m in enumerate(_MONTH_ABBRS)
+)
+_MONTH_KEYS = np.array([key for key, _ in _MONTH_LOOKUP], dtype=np.int64)
+_MONTH_NUMBERS = np.array([month for _, month in _MONTH_LOOKUP], dtype=np.int64)
+
+def _pct_label(percentile: float) -> str:
+    return f"p{percentile:g}"
+
+def profile_report_columns(percentile: float = 90.0) -> List[str]:
+    p = _pct_label(percentile)
+    return [
+        "profile",
+        "tweets",
+        "followers_count",
+        "favorite_median",
+        f"favorite_{p}",
+        "retweet_median",
+        f"retweet_{p}",
+        "views_median",
+        "engagement_rate_pct",
+        "tweets_per_day",
+        "median_gap_hours",
+    ]
+
+def daily_report_columns(percentile: float = 90.0, window: int = 7) -> List[str]:
+    p = _pct_label(percentile)
+    return [
+        "day",
+        "tweets",
+        "favorite_median",
+        f"favorite_{p}",
+        "retweet_median",
+        f"retweet_{p}",
+        "engagement_rate_pct",
+        f"tweets_{window}d",
+        f"favorite_avg_{window}d",
+        f"retweet_avg_{window}d",
+    ]
+
+@dataclass
+class TweetColumns:
+    """
+    Column-oriented view of exported tweets.
+
+    Every array has one entry per tweet. Profiles are dictionary-encoded:
+    ``profile_codes[i]`` indexes into ``profiles``. Missing views and
+    follower counts are stored as NaN.
+    """
+    profiles: List[str]
+    profile_codes: np.ndarray
+    created_ts: np.ndarray
+    favorite_count: np.ndarray
+    retweet_count: np.ndarray
+    reply_count: np.ndarray
+    views_count: np.ndarray
+    followers_count: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.created_ts.shape[0])
+
+_INT64_MIN = int(np.iinfo(np.int64).min)
+_INT64_MAX = int(np.iinfo(np.int64).max)
+
+def _to_float(value: Any) -> float:
+    if isinstance(value, bool):
+        return math.nan
+    if isinstance(value, float):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if isinstance(value, int):
+        try:
+            return float(value)
+        except OverflowError:
+            return math.nan
+    return math.nan
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, bool):
+        return 0
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return 0
+        value = int(value)
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if isinstance(value, int):
+        # Counts beyond int64 are clamped rather than aborting the report.
+        return min(max(value, _INT64_MIN), _INT64_MAX)
+    return 0
+
+def _int_column(values: List[Any]) -> np.ndarray:
+    # Exporter output is plain ints; anything else takes the per-value path
+    # so a cell's result never depends on the other rows in its column.
+    if set(map(type, values)) <= {int}:
+        try:
+            return np.array(values, dtype=np.int64).reshape(len(values))
+        except OverflowError:
+            pass
+    return np.fromiter((_to_int(v) for v in values), dtype=np.int64, count=len(values))
+
+def _float_column(values: List[Any]) -> np.ndarray:
+    # None becomes NaN here, which is how missing views/followers are stored.
+    if set(map(type, values)) <= {int, type(None)}:
+        try:
+            return np.array(values, dtype=np.float64).reshape(len(values))
+        except OverflowError:
+            pass
+    return np.fromiter((_to_float(v) for v in values), dtype=np.float64, count=len(values))
+
+def _parse_twitter_layout(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(texts)
+    lengths = np.fromiter((len(v) for v in texts), dtype=np.int64, count=n)
+    chars = np.array(texts, dtype=f"U{_TWITTER_TS_LEN}").view(np.uint32).reshape(n, _TWITTER_TS_LEN)
+
+    def _char(col: int) -> np.ndarray:
+        return chars[:, col].astype(np.int64)
+
+    def _number(*cols: int) -> np.ndarray:
+        out = np.zeros(n, dtype=np.int64)
+        for col in cols:
+            out = out * 10 + (_char(col) - ord("0"))
+        return out
+
+    digits = chars[:, _TWITTER_TS_DIGITS]
+    ok = lengths == _TWITTER_TS_LEN
+    ok &= ((digits >= ord("0")) & (digits <= ord("9"))).all(axis=1)
+    ok &= (chars[:, _TWITTER_TS_SPACES] == ord(" ")).all(axis=1)
+    ok &= (chars[:, _TWITTER_TS_COLONS] == ord(":")).all(axis=1)
+    ok &= (chars[:, 20] == ord("+")) | (chars[:, 20] == ord("-"))
+
+    keys = (_char(4) << 16) | (_char(5) << 8) | _char(6)
+    slot = np.clip(np.searchsorted(_MONTH_KEYS, keys), 0, len(_MONTH_KEYS) - 1)
+    ok &= _MONTH_KEYS[slot] == keys
+
+    day = _number(8, 9)
+    hour = _number(11, 12)
+    minute = _number(14, 15)
+    second = _number(17, 18)
+    offset = _number(21, 22) * 3600 + _number(23, 24) * 60
+    year = _number(26, 27, 28, 29)
+    ok &= (day >= 1) & (day <= 31) & (hour <= 23) & (minute <= 59) & (second <= 60)
+
+    months_since_epoch = np.where(ok, (year - 1970) * 12 + (_MONTH_NUMBERS[slot] - 1), 0)
+    month_start = months_since_epoch.astype("datetime64[M]")
+    epoch_days = month_start.astype("datetime64[D]").astype(np.int64) + day - 1
+    # Days past the end of the month (e.g. Feb 31) would roll into the next one.
+    ok &= epoch_days.astype("datetime64[D]").astype("datetime64[M]") == month_start
+    sign = np.where(chars[:, 20] == ord("-"), -1, 1)
+    ts = epoch_days * SECONDS_PER_DAY + hour * 3600 + minute * 60 + second - sign * offset
+    return np.where(ok, ts, 0), ok
+
+def parse_created_at_column(
+    values: Sequence[Optional[str]],
+    chunk_size: int = 1_000_000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse a column of ``created_at`` strings into UTC epoch seconds.
+
+    Strings in the canonical Twitter layout are decoded in bulk from a
+    fixed-width character matrix, ``chunk_size`` rows at a time to bound
+    memory; anything else falls back to ``parse_twitter_timestamp``.
+
+    Returns ``(timestamps, valid)`` where ``valid`` marks rows that parsed.
+    """
+    n = len(values)
+    ts = np.zeros(n, dtype=np.int64)
+    valid = np.zeros(n, dtype=bool)
+
+    for start in range(0, n, chunk_size):
+        texts = [v if isinstance(v, str) else "" for v in values[start:start + chunk_size]]
+        chunk_ts, chunk_ok = _parse_twitter_layout(texts)
+        ts[start:start + len(texts)] = chunk_ts
+        valid[start:start + len(texts)] = chunk_ok
+
+        for i in np.flatnonzero(~chunk_ok):
+            dt = parse_twitter_timestamp(texts[i])
+            if dt is not None:
+                ts[start + i] = int(dt.timestamp())
+                valid[start + i] = True
+
+    return ts, valid
+
+def columns_from_rows(rows: Iterable[Dict[str, Any]]) -> TweetColumns:
+    """
+    Convert tweet dicts (as written by the JSON exporter) into ``TweetColumns``.
+
+    Tweets are grouped under ``_source_profile`` when present, otherwise
+    under the author's screen name. Rows whose ``created_at`` cannot be
+    parsed are dropped.
+    """
+    rows = [row for row in rows if isinstance(row, dict)]
+    users = [row.get("user") or {} for row in rows]
+
+    profile_index: Dict[str, int] = {}
+    codes = [
+        profile_index.setdefault(row.get("_source_profile") or user.get("screen_name") or "", len(profile_index))
+        for row, user in zip(rows, users)
+    ]
+    created = [row.get("created_at") for row in rows]
+    ts, valid = parse_created_at_column(created)
+    dropped = int((~valid).sum())
+    if dropped:
+        logger.warning("Dropping %d tweet(s) with unparseable created_at.", dropped)
+
+    return TweetColumns(
+        profiles=list(profile_index),
+        profile_codes=np.asarray(codes, dtype=np.int64)[valid],
+        created_ts=ts[valid],
+        favorite_count=_int_column([row.get("favorite_count") for row in rows])[valid],
+        retweet_count=_int_column([row.get("retweet_count") for row in rows])[valid],
+        reply_count=_int_column([row.get("reply_count") for row in rows])[valid],
+        views_count=_float_column([row.get("views_count") for row in rows])[valid],
+        followers_count=_float_column([user.get("followers_count") for user in users])[valid],
+    )
+
+def load_export_json(paths: Sequence[Path]) -> TweetColumns:
+    rows: List[Dict[str, Any]] = []
+    for path in paths:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            raise ValueError(f"Expected a JSON array of tweets in {path}")
+        logger.info("Loaded %d tweet(s) from %s", len(data), path)
+        rows.extend(data)
+    return columns_from_rows(rows)
+
+def _sort_within_groups(
+    values: np.ndarray,
+    codes: np.ndarray,
+    n_groups: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sort rows by ``(code, value)`` and return the sorted codes and values.
+
+    Integer values are packed together with their group code into a single
+    int64 key so one plain sort replaces the much slower ``np.lexsort``.
+    """
+    if values.size and values.dtype.kind in "iu":
+        low = int(values.min())
+        span = int(values.max()) - low + 1
+        if n_groups * span < 2 ** 62:
+            keys = codes * span + (values - low)
+            keys.sort()
+            return keys // span, keys % span + low
+    order = np.lexsort((values, codes))
+    return codes[order], values[order]
+
+def grouped_percentiles(
+    values: np.ndarray,
+    codes: np.ndarray,
+    n_groups: int,
+    qs: Sequence[float],
+) -> np.ndarray:
+    """
+    Percentiles of ``values`` within each group, ignoring NaN.
+
+    Uses the same linear interpolation as ``np.percentile``. Returns an
+    array of shape ``(len(qs), n_groups)``; empty groups yield NaN.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == "f":
+        keep = ~np.isnan(values)
+        values = values[keep]
+        codes = codes[keep]
+        if values.size and (values == np.floor(values)).all() and np.abs(values).max() < 2 ** 53:
+            values = values.astype(np.int64)
+
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    v_sorted = _sort_within_groups(values, codes, n_groups)[1].astype(np.float64)
+
+    out = np.full((len(qs), n_groups), np.nan)
+    has = counts > 0
+    for row, q in enumerate(qs):
+        pos = starts[has] + (counts[has] - 1) * (q / 100.0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.ceil(pos).astype(np.int64)
+        out[row, has] = v_sorted[lo] + (v_sorted[hi] - v_sorted[lo]) * (pos - lo)
+    return out
+
+def _grouped_mean(values: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    keep = ~np.isnan(values)
+    sums = np.bincount(codes[keep], weights=values[keep], minlength=n_groups)
+    counts = np.bincount(codes[keep], minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+def engagement_rates(cols: TweetColumns) -> np.ndarray:
+    """Per-tweet (favorites + retweets + replies) / followers, in percent."""
+    interactions = (cols.favorite_count + cols.retweet_count + cols.reply_count).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rates = interactions / cols.followers_count * 100.0
+    rates[~(cols.followers_count > 0)] = np.nan
+    return rates
+
+def build_profile_report(cols: TweetColumns, percentile: float = 90.0) -> List[Dict[str, Any]]:
+    n_groups = len(cols.profiles)
+    codes = cols.profile_codes
+    qs = (50.0, percentile)
+    p = _pct_label(percentile)
+
+    tweets = np.bincount(codes, minlength=n_groups)
+    fav = grouped_percentiles(cols.favorite_count, codes, n_groups, qs)
+    rt = grouped_percentiles(cols.retweet_count, codes, n_groups, qs)
+    views = grouped_percentiles(cols.views_count, codes, n_groups, (50.0,))[0]
+    rate = _grouped_mean(engagement_rates(cols), codes, n_groups)
+
+    followers = np.full(n_groups, np.nan)
+    known = ~np.isnan(cols.followers_count)
+    np.fmax.at(followers, codes[known], cols.followers_count[known])
+
+    # Cadence: sort by (profile, time) and look at gaps between neighbours.
+    sorted_codes, sorted_ts = _sort_within_groups(cols.created_ts, codes, n_groups)
+    same = sorted_codes[1:] == sorted_codes[:-1]
+    gaps = (sorted_ts[1:] - sorted_ts[:-1])[same]
+    median_gap = grouped_percentiles(gaps, sorted_codes[1:][same], n_groups, (50.0,))[0] / 3600.0
+
+    has = tweets > 0
+    ends = np.cumsum(tweets)
+    span_days = np.ones(n_groups)
+    span_days[has] = np.maximum(
+        (sorted_ts[ends[has] - 1] - sorted_ts[ends[has] - tweets[has]]) / SECONDS_PER_DAY, 1.0
+    )
+    per_day = np.where(has, tweets / span_days, np.nan)
+
+    report: List[Dict[str, Any]] = []
+    for g in np.argsort(-tweets, kind="stable"):
+        if tweets[g] == 0:
+            continue
+        report.append({
+            "profile": cols.profiles[g],
+            "tweets": int(tweets[g]),
+            "followers_count": followers[g],
+            "favorite_median": fav[0, g],
+            f"favorite_{p}": fav[1, g],
+            "retweet_median": rt[0, g],
+            f"retweet_{p}": rt[1, g],
+            "views_median": views[g],
+            "engagement_rate_pct": rate[g],
+            "tweets_per_day": per_day[g],
+            "median_gap_hours": median_gap[g],
+        })
+    return report
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    csum = np.cumsum(values, dtype=np.float64)
+    out = csum.copy()
+    out[window:] -= csum[:-window]
+    return out
+
+def build_daily_report(
+    cols: TweetColumns,
+    percentile: float = 90.0,
+    window: int = 7,
+) -> List[Dict[str, Any]]:
+    """
+    Per-day (UTC) aggregates across all profiles.
+
+    Rolling columns cover the ``window`` calendar days ending on each row,
+    including days on which nothing was posted.
+    """
+    if len(cols) == 0:
+        return []
+
+    days = cols.created_ts // SECONDS_PER_DAY
+    first_day = int(days.min())
+    codes = days - first_day
+    n_days = int(codes.max()) + 1
+    qs = (50.0, percentile)
+    p = _pct_label(percentile)
+
+    tweets = np.bincount(codes, minlength=n_days)
+    fav = grouped_percentiles(cols.favorite_count, codes, n_days, qs)
+    rt = grouped_percentiles(cols.retweet_count, codes, n_days, qs)
+    rate = _grouped_mean(engagement_rates(cols), codes, n_days)
+
+    rolling_tweets = _rolling_sum(tweets, window)
+    rolling_fav = _rolling_sum(np.bincount(codes, weights=cols.favorite_count, minlength=n_days), window)
+    rolling_rt = _rolling_sum(np.bincount(codes, weights=cols.retweet_count, minlength=n_days), window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rolling_fav_avg = np.where(rolling_tweets > 0, rolling_fav / rolling_tweets, np.nan)
+        rolling_rt_avg = np.where(rolling_tweets > 0, rolling_rt / rolling_tweets, np.nan)
+
+    labels = (np.arange(n_days) + first_day).astype("datetime64[D]")
+    report: List[Dict[str, Any]] = []
+    for d in np.flatnonzero(tweets):
+        report.append({
+            "day": str(labels[d]),
+            "tweets": int(tweets[d]),
+            "favorite_median": fav[0, d],
+            f"favorite_{p}": fav[1, d],
+            "retweet_median": rt[0, d],
+            f"retweet_{p}": rt[1, d],
+            "engagement_rate_pct": rate[d],
+            f"tweets_{window}d": int(rolling_tweets[d]),
+            f"favorite_avg_{window}d": rolling_fav_avg[d],
+            f"retweet_avg_{window}d": rolling_rt_avg[d],
+        })
+    report.reverse()
+    return report
+
+def _format_cell(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, (float, np.floating)):
+        if math.isnan(value):
+            return "-"
+        if float(value).is_integer():
+            return f"{value:,.0f}"
+        if abs(value) < 1:
+            return f"{value:.4f}"
+        return f"{value:,.2f}"
+    if isinstance(value, (int, np.integer)):
+        return f"{value:,}"
+    return str(value)
+
+def format_table(rows: List[Dict[str, Any]], columns: List[str]) -> str:
+    cells = [[_format_cell(row.get(col)) for col in columns] for row in rows]
+    widths = [len(col) for col in columns]
+    for line in cells:
+        widths = [max(w, len(c)) for w, c in zip(widths, line)]
+
+    def _line(values: List[str]) -> str:
+        # Left-align the first (label) column, right-align the numbers.
+        parts = [values[0].ljust(widths[0])]
+        parts.extend(v.rjust(w) for v, w in zip(values[1:], widths[1:]))
+        return "  ".join(parts)
+
+    out = [_line(columns), "  ".join("-" * w for w in widths)]
+    out.extend(_line(line) for line in cells)
+    return "\n".join(out)
+
+def write_report_csv(rows: List[Dict[str, Any]], columns: List[str], output_path: Path) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({
+                k: ("" if isinstance(v, float) and math.isnan(v) else v)
+                for k, v in row.items()
+            })
+    logger.info("Wrote %d report row(s) to CSV: %s", len(rows), output_path)
+
+def run_report(
+    input_paths: Sequence[Path],
+    group_by: str = "profile",
+    percentile: float = 90.0,
+    window: int = 7,
+    output_path: Optional[Path] = None,
+) -> str:
+    cols = load_export_json(input_paths)
+    logger.info("Building %s report over %d tweet(s).", group_by, len(cols))
+
+    if group_by == "profile":
+        rows = build_profile_report(cols, percentile)
+        columns = profile_report_columns(percentile)
+    elif group_by == "day":
+        rows = build_daily_report(cols, percentile, window)
+        columns = daily_report_columns(percentile, window)
+    else:
+        raise ValueError(f"Unsupported report grouping: {group_by}")
+
+    if output_path is not None:
+        write_report_csv(rows, columns, output_path)
+    return format_table(rows, columns)
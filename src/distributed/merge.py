@@ -0,0 +1,127 @@
+import heapq
+import itertools
+import json
+import logging
+import re
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from analytics.engagement_report import parse_created_at_column
+
+logger = logging.getLogger(__name__)
+
+# Sort key for tweets without a parseable created_at; they sort last, as with tweet_sort_key.
+_MISSING_KEY = -(2 ** 62)
+
+_WHITESPACE = re.compile(r"\s*")
+
+def expand_merge_inputs(paths: Sequence[Path]) -> List[Path]:
+    """Expand directories to the JSON exports they contain."""
+    expanded: List[Path] = []
+    for path in paths:
+        if path.is_dir():
+            expanded.extend(sorted(p for p in path.glob("*.json") if not p.name.startswith(".")))
+        else:
+            expanded.append(path)
+    return expanded
+
+def _iter_json_array(path: Path, chunk_chars: int = 1 << 20) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    with path.open("r", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def read_more() -> None:
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_chars)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+
+        def peek() -> str:
+            nonlocal pos
+            while True:
+                pos = _WHITESPACE.match(buf, pos).end()
+                if pos < len(buf) or eof:
+                    return buf[pos:pos + 1]
+                read_more()
+
+        if peek() != "[":
+            raise ValueError(f"Expected a JSON array of tweets in {path}")
+        pos += 1
+        if peek() == "]":
+            return
+
+        while True:
+            peek()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    read_more()
+                    continue
+                if eof or isinstance(value, (dict, list, str)):
+                    break
+                # A number or literal is only complete once a separator follows it.
+                after = _WHITESPACE.match(buf, end).end()
+                if after < len(buf) and buf[after] in ",]":
+                    break
+                read_more()
+            pos = end
+            yield value
+
+            sep = peek()
+            if sep == "]":
+                return
+            if sep != ",":
+                raise ValueError(f"Malformed JSON array in {path}")
+            pos += 1
+
+def _iter_sorted_run(path: Path, batch_size: int = 10_000) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Stream ``(sort key, tweet)`` pairs from one newest-first export."""
+    tweets = (t for t in _iter_json_array(path) if isinstance(t, dict))
+    previous = None
+    while True:
+        batch = list(itertools.islice(tweets, batch_size))
+        if not batch:
+            return
+        ts, valid = parse_created_at_column([t.get("created_at") for t in batch])
+        keys = np.where(valid, ts, _MISSING_KEY)
+        if (previous is not None and keys[0] > previous) or np.any(keys[:-1] < keys[1:]):
+            raise ValueError(f"{path} is not in reverse chronological order; sort it before merging.")
+        previous = keys[-1]
+        yield from zip(keys.tolist(), batch)
+
+def iter_merged(paths: Sequence[Path]) -> Iterator[Dict[str, Any]]:
+    """
+    K-way merge of per-shard exports, each newest first, into one stream.
+
+    Inputs are read incrementally, so memory stays bounded by one batch of
+    tweets per input. Tweets seen in more than one input (same ``id_str``)
+    are emitted once. Copies of a tweet share its ``created_at``, so only
+    ids at the current timestamp are remembered.
+    """
+    runs = [_iter_sorted_run(path) for path in paths]
+    current_key = None
+    seen = set()
+    for key, tweet in heapq.merge(*runs, key=itemgetter(0), reverse=True):
+        if key != current_key:
+            current_key = key
+            seen.clear()
+        tweet_id = tweet.get("id_str")
+        if tweet_id:
+            if tweet_id in seen:
+                continue
+            seen.add(tweet_id)
+        yield tweet
+
+def merge_exports(paths: Sequence[Path]) -> List[Dict[str, Any]]:
+    """Merge into a list, for export formats that need every row at once."""
+    inputs = expand_merge_inputs(paths)
+    merged = list(iter_merged(inputs))
+    logger.info("Merged %d tweet(s) from %d file(s).", len(merged), len(inputs))
+    return merged
@@ -0,0 +1,60 @@
+import hashlib
+import logging
+from typing import List, Tuple
+
+from extractors.twitter_parser import extract_screen_name_from_url
+
+logger = logging.getLogger(__name__)
+
+def jump_hash(key: int, num_buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach).
+
+    Maps a 64-bit key to a bucket in ``[0, num_buckets)``. Growing from N to
+    N+1 buckets only moves about 1/(N+1) of the keys.
+    """
+    if num_buckets < 1:
+        raise ValueError("num_buckets must be at least 1")
+
+    b, j = -1, 0
+    while j < num_buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+def shard_key(url: str) -> str:
+    """
+    Key used to place a URL on a shard.
+
+    Profile URLs hash by lowercased screen name, so twitter.com and x.com
+    links to the same account always land together.
+    """
+    try:
+        return extract_screen_name_from_url(url).lower()
+    except ValueError:
+        return url.strip().lower()
+
+def shard_for_url(url: str, num_shards: int) -> int:
+    digest = hashlib.blake2b(shard_key(url).encode("utf-8"), digest_size=8).digest()
+    return jump_hash(int.from_bytes(digest, "big"), num_shards)
+
+def parse_shard_spec(value: str) -> Tuple[int, int]:
+    """
+    Parse a ``i/N`` shard spec. ``i`` is zero-based, so valid specs for
+    N=4 are 0/4 through 3/4.
+    """
+    try:
+        index_str, total_str = value.split("/", 1)
+        index, total = int(index_str), int(total_str)
+    except ValueError as exc:
+        raise ValueError(f"Invalid shard spec '{value}', expected i/N (e.g. 0/4)") from exc
+
+    if total < 1 or not 0 <= index < total:
+        raise ValueError(f"Invalid shard spec '{value}', need 0 <= i < N")
+    return index, total
+
+def filter_urls_for_shard(urls: List[str], index: int, total: int) -> List[str]:
+    selected = [url for url in urls if shard_for_url(url, total) == index]
+    logger.info("Shard %d/%d owns %d of %d URL(s).", index, total, len(selected), len(urls))
+    return selected
@@ -0,0 +1,186 @@
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from extractors.twitter_parser import extract_screen_name_from_url
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_LEASED = "leased"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    handle TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires);
+"""
+
+@dataclass
+class Task:
+    handle: str
+    url: str
+    attempts: int
+
+class WorkQueue:
+    """
+    Lease-based work queue of profile URLs backed by a single SQLite file.
+
+    Workers ``claim`` a task, which leases it for ``lease_seconds``. A task
+    whose lease runs out (for example because its worker died) becomes
+    claimable again, until it has been attempted ``max_attempts`` times.
+    The file can be shared by any number of processes on one host. SQLite's
+    WAL mode needs shared memory, so it must not be used from several
+    machines or over a network filesystem; use a real broker for that.
+    """
+
+    def __init__(self, path: Path, lease_seconds: float = 300.0, max_attempts: int = 3) -> None:
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def enqueue(self, urls: Iterable[str], requeue: bool = False) -> int:
+        """
+        Add profile URLs that are not queued yet. Returns how many were added.
+
+        URLs that are not Twitter/X profile URLs are logged and skipped. With
+        ``requeue``, profiles already done or failed are reset to pending
+        with no attempts used, so the same queue can drive another round;
+        they count as added. Pending and leased profiles are left alone.
+        """
+        now = time.time()
+        rows = []
+        for url in urls:
+            if not url.strip():
+                continue
+            try:
+                screen_name = extract_screen_name_from_url(url)
+            except ValueError as exc:
+                logger.error("Skipping URL '%s': %s", url, exc)
+                continue
+            rows.append((screen_name.lower(), url.strip(), now))
+
+        sql = "INSERT INTO tasks (handle, url, updated_at) VALUES (?, ?, ?) ON CONFLICT (handle) DO "
+        if requeue:
+            sql += (
+                "UPDATE SET url = excluded.url, status = 'pending', attempts = 0, lease_owner = NULL, "
+                "lease_expires = NULL, last_error = NULL, updated_at = excluded.updated_at "
+                f"WHERE status IN ('{STATUS_DONE}', '{STATUS_FAILED}')"
+            )
+        else:
+            sql += "NOTHING"
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self._conn.total_changes
+            self._conn.executemany(sql, rows)
+            added = self._conn.total_changes - before
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        logger.info("Enqueued %d task(s) in %s", added, self.path)
+        return added
+
+    def claim(self, worker_id: str) -> Optional[Task]:
+        """Lease the next available task, or return None if nothing is claimable now."""
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Leases that expired on their last allowed attempt are given up on.
+            self._conn.execute(
+                "UPDATE tasks SET status = ?, last_error = COALESCE(last_error, 'lease expired'), "
+                "lease_owner = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (STATUS_FAILED, now, STATUS_LEASED, now, self.max_attempts),
+            )
+            row = self._conn.execute(
+                "SELECT handle, url, attempts FROM tasks "
+                "WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY attempts, handle LIMIT 1",
+                (STATUS_PENDING, STATUS_LEASED, now),
+            ).fetchone()
+            if row is None:
+                self._conn.execute("COMMIT")
+                return None
+
+            handle, url, attempts = row
+            self._conn.execute(
+                "UPDATE tasks SET status = ?, attempts = ?, lease_owner = ?, lease_expires = ?, "
+                "updated_at = ? WHERE handle = ?",
+                (STATUS_LEASED, attempts + 1, worker_id, now + self.lease_seconds, now, handle),
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        if attempts:
+            logger.info("Retrying @%s (attempt %d of %d).", handle, attempts + 1, self.max_attempts)
+        return Task(handle=handle, url=url, attempts=attempts + 1)
+
+    def complete(self, task: Task, worker_id: str) -> bool:
+        """
+        Mark a leased task as done.
+
+        Returns False if the lease was lost to another worker in the meantime;
+        the caller's result is still valid but the task will be finished again.
+        """
+        cur = self._conn.execute(
+            "UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE handle = ? AND status = ? AND lease_owner = ?",
+            (STATUS_DONE, time.time(), task.handle, STATUS_LEASED, worker_id),
+        )
+        return cur.rowcount == 1
+
+    def fail(self, task: Task, worker_id: str, error: str, retry: bool = True) -> None:
+        """
+        Release a leased task after an error.
+
+        The task goes back to pending unless ``retry`` is False or it has
+        used up its attempts, in which case it is marked failed.
+        """
+        retry = retry and task.attempts < self.max_attempts
+        status = STATUS_PENDING if retry else STATUS_FAILED
+        self._conn.execute(
+            "UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = NULL, last_error = ?, "
+            "updated_at = ? WHERE handle = ? AND status = ? AND lease_owner = ?",
+            (status, error, time.time(), task.handle, STATUS_LEASED, worker_id),
+        )
+
+    def counts(self) -> Dict[str, int]:
+        counts = {status: 0 for status in (STATUS_PENDING, STATUS_LEASED, STATUS_DONE, STATUS_FAILED)}
+        for status, n in self._conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status"):
+            counts[status] = n
+        return counts
+
+    def is_drained(self) -> bool:
+        """True once every task is either done or failed."""
+        counts = self.counts()
+        return counts[STATUS_PENDING] == 0 and counts[STATUS_LEASED] == 0
@@ -0,0 +1,86 @@
+import logging
+import os
+import socket
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+
+from distributed.work_queue import WorkQueue
+from extractors.twitter_parser import TWITTER_PROFILE_ENDPOINT, extract_screen_name_from_url, scrape_profile
+from outputs.exporter import export_data
+from outputs.snapshot_store import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def task_output_path(output_dir: Path, handle: str) -> Path:
+    return output_dir / f"{handle}.json"
+
+def run_worker(
+    queue: WorkQueue,
+    output_dir: Path,
+    since_dt: datetime,
+    endpoint: str = TWITTER_PROFILE_ENDPOINT,
+    worker_id: Optional[str] = None,
+    poll_interval: float = 2.0,
+    snapshot_dir: Optional[Path] = None,
+) -> Dict[str, int]:
+    """
+    Claim and scrape tasks until the queue is drained.
+
+    Each profile is written to ``<output_dir>/<handle>.json`` in reverse
+    chronological order, ready for ``merge``. Files are written under a
+    temporary name first, so a worker that dies mid-task never leaves a
+    partial result behind. Only fetch errors are retried; anything else
+    fails the task right away. With ``snapshot_dir`` each profile's counters
+    are also appended to that snapshot store, which workers can share.
+    Returns this worker's done/failed counts.
+    """
+    worker_id = worker_id or default_worker_id()
+    store = SnapshotStore(snapshot_dir) if snapshot_dir is not None else None
+    stats = {"done": 0, "failed": 0}
+
+    while True:
+        task = queue.claim(worker_id)
+        if task is None:
+            if queue.is_drained():
+                break
+            # Other workers still hold leases; wait in case one of them dies.
+            time.sleep(poll_interval)
+            continue
+
+        try:
+            screen_name = extract_screen_name_from_url(task.url)
+            tweets = scrape_profile(screen_name, since_dt, endpoint)
+            final_path = task_output_path(output_dir, task.handle)
+            tmp_path = final_path.with_name(f".{final_path.name}.{worker_id}.tmp")
+            export_data(tweets, "json", tmp_path)
+            os.replace(tmp_path, final_path)
+        except requests.RequestException as exc:
+            logger.error("Worker %s failed to fetch @%s: %s", worker_id, task.handle, exc)
+            queue.fail(task, worker_id, str(exc))
+            stats["failed"] += 1
+            continue
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Worker %s failed on @%s: %s", worker_id, task.handle, exc)
+            queue.fail(task, worker_id, str(exc), retry=False)
+            stats["failed"] += 1
+            continue
+
+        if store is not None and tweets:
+            try:
+                store.append(tweets)
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Failed to record engagement snapshot for @%s: %s", task.handle, exc)
+
+        if not queue.complete(task, worker_id):
+            logger.warning("Lease on @%s expired before completion; another worker may redo it.", task.handle)
+        stats["done"] += 1
+
+    logger.info("Worker %s finished: %d done, %d failed.", worker_id, stats["done"], stats["failed"])
+    return stats
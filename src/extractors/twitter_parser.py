@@ -1,11 +1,10 @@
-thonimport logging
+import logging
 import re
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, Iterable, List, Optional, Any
 
 import requests
-from dateutil import parser as dt_parser
 
 from .utils_date import parse_twitter_timestamp
 
@@ -25,6 +24,7 @@ class NormalizedTweet:
     bookmark_count: int
     created_at: str
     created_at_dt: datetime
+    id_str: str
     conversation_id_str: str
     entities: Optional[Dict[str, Any]]
     favorite_count: int
@@ -49,7 +49,11 @@ def extract_screen_name_from_url(url: str) -> str:
     logger.debug("Extracted screen_name '%s' from URL '%s'", screen_name, url)
     return screen_name
 
-def fetch_profile_tweets(screen_name: str, count: int = 200) -> Dict[str, Any]:
+def fetch_profile_tweets(
+    screen_name: str,
+    count: int = 200,
+    endpoint: str = TWITTER_PROFILE_ENDPOINT,
+) -> Dict[str, Any]:
     """
     Fetch raw timeline data from Twitter's public profile syndication endpoint.
 
@@ -66,7 +70,7 @@ def fetch_profile_tweets(screen_name: str, count: int = 200) -> Dict[str, Any]:
     }
 
     logger.info("Fetching tweets for @%s", screen_name)
-    resp = requests.get(TWITTER_PROFILE_ENDPOINT, params=params, headers=headers, timeout=15)
+    resp = requests.get(endpoint, params=params, headers=headers, timeout=15)
     resp.raise_for_status()
 
     try:
@@ -158,7 +162,8 @@ def _normalize_tweet(tweet_obj: Dict[str, Any], user_obj: Optional[Dict[str, Any
         logger.debug("Could not parse created_at '%s'", created_at_str)
         return None
 
-    conversation_id = tweet_obj.get("conversation_id_str") or str(tweet_obj.get("id_str") or tweet_obj.get("id") or "")
+    tweet_id = str(tweet_obj.get("id_str") or tweet_obj.get("id") or "")
+    conversation_id = tweet_obj.get("conversation_id_str") or tweet_id
     full_text = tweet_obj.get("full_text") or tweet_obj.get("text") or ""
 
     entities = tweet_obj.get("entities") or {}
@@ -185,6 +190,7 @@ def _normalize_tweet(tweet_obj: Dict[str, Any], user_obj: Optional[Dict[str, Any
         bookmark_count=int(bookmark_count or 0),
         created_at=created_at_str,
         created_at_dt=dt,
+        id_str=tweet_id,
         conversation_id_str=conversation_id,
         entities=entities,
         favorite_count=int(favorite_count or 0),
@@ -199,6 +205,7 @@ def _flatten_normalized_tweet(t: NormalizedTweet) -> Dict[str, Any]:
     return {
         "bookmark_count": t.bookmark_count,
         "created_at": t.created_at,
+        "id_str": t.id_str,
         "conversation_id_str": t.conversation_id_str,
         "entities": t.entities,
         "favorite_count": t.favorite_count,
@@ -246,7 +253,37 @@ def normalize_and_filter_tweets(
 
     return [_flatten_normalized_tweet(t) for t in normalized]
 
-def scrape_tweets_for_urls(urls: List[str], since_dt: datetime) -> List[Dict[str, Any]]:
+def tweet_sort_key(obj: Dict[str, Any]) -> float:
+    """Sort key for exported tweets: created_at as epoch seconds, -inf if unknown."""
+    created_at = obj.get("created_at")
+    if isinstance(created_at, str):
+        dt = parse_twitter_timestamp(created_at)
+        if dt is not None:
+            return dt.timestamp()
+    return float("-inf")
+
+def scrape_profile(
+    screen_name: str,
+    since_dt: datetime,
+    endpoint: str = TWITTER_PROFILE_ENDPOINT,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch and normalize one profile's tweets, newest first.
+
+    Unlike ``scrape_tweets_for_urls`` this lets fetch and parse errors
+    propagate, so callers can retry the profile.
+    """
+    raw = fetch_profile_tweets(screen_name, endpoint=endpoint)
+    normalized = normalize_and_filter_tweets(raw, since_dt)
+    for tweet in normalized:
+        tweet["_source_profile"] = screen_name
+    return normalized
+
+def scrape_tweets_for_urls(
+    urls: List[str],
+    since_dt: datetime,
+    endpoint: str = TWITTER_PROFILE_ENDPOINT,
+) -> List[Dict[str, Any]]:
     all_tweets: List[Dict[str, Any]] = []
 
     for url in urls:
@@ -257,35 +294,17 @@ def scrape_tweets_for_urls(urls: List[str], since_dt: datetime) -> List[Dict[str
             continue
 
         try:
-            raw = fetch_profile_tweets(screen_name)
+            normalized = scrape_profile(screen_name, since_dt, endpoint)
         except requests.RequestException as exc:
             logger.error("Failed to fetch tweets for @%s: %s", screen_name, exc)
             continue
         except Exception as exc:  # noqa: BLE001
-            logger.exception("Unexpected error while fetching @%s: %s", screen_name, exc)
-            continue
-
-        try:
-            normalized = normalize_and_filter_tweets(raw, since_dt)
-        except Exception as exc:  # noqa: BLE001
-            logger.exception("Failed to normalize tweets for @%s: %s", screen_name, exc)
+            logger.exception("Failed to scrape tweets for @%s: %s", screen_name, exc)
             continue
 
-        for tweet in normalized:
-            tweet["_source_profile"] = screen_name
-
         all_tweets.extend(normalized)
 
     # Final global sorting by created_at (reverse chronological)
-    def sort_key(obj: Dict[str, Any]) -> datetime:
-        created_at = obj.get("created_at")
-        if isinstance(created_at, str):
-            try:
-                return dt_parser.parse(created_at)
-            except Exception:
-                return datetime.min
-        return datetime.min
-
-    all_tweets.sort(key=sort_key, reverse=True)
+    all_tweets.sort(key=tweet_sort_key, reverse=True)
     logger.info("Aggregated %d tweet(s) across all URLs.", len(all_tweets))
-    return all_tweets
\ No newline at end of file
+    return all_tweets
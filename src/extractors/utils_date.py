@@ -1,4 +1,4 @@
-thonfrom __future__ import annotations
+from __future__ import annotations
 
 import logging
 from datetime import datetime, timedelta, timezone
@@ -1,12 +1,19 @@
-thonimport argparse
+import argparse
 import json
 import logging
+import sys
 from pathlib import Path
 from typing import List, Optional
 
-from extractors.twitter_parser import scrape_tweets_for_urls
+from analytics.engagement_report import format_table, run_report
+from distributed.merge import expand_merge_inputs, iter_merged, merge_exports
+from distributed.sharding import filter_urls_for_shard, parse_shard_spec
+from distributed.work_queue import WorkQueue
+from distributed.worker import run_worker
+from extractors.twitter_parser import TWITTER_PROFILE_ENDPOINT, scrape_tweets_for_urls
 from extractors.utils_date import parse_since_date, default_since_date
-from outputs.exporter import export_data
+from outputs.exporter import export_data, export_json_stream
+from outputs.snapshot_store import SnapshotStore
 
 def load_settings(config_path: Path) -> dict:
     if not config_path.exists():
@@ -70,6 +77,26 @@ def resolve_output_path(
     out_path = (base_dir / output_dir / output_file).resolve()
     return out_path
 
+def resolve_endpoint(cli_endpoint: Optional[str], settings: dict) -> str:
+    if cli_endpoint:
+        return cli_endpoint
+
+    cfg_endpoint = settings.get("profile_endpoint")
+    if isinstance(cfg_endpoint, str) and cfg_endpoint:
+        return cfg_endpoint
+
+    return TWITTER_PROFILE_ENDPOINT
+
+def resolve_snapshot_dir(cli_dir: Optional[str], base_dir: Path, settings: dict) -> Optional[Path]:
+    if cli_dir:
+        return Path(cli_dir).expanduser().resolve()
+
+    cfg_dir = settings.get("snapshot_dir")
+    if isinstance(cfg_dir, str) and cfg_dir:
+        return (base_dir / cfg_dir).resolve()
+
+    return None
+
 def read_urls_from_file(path: Path) -> List[str]:
     if not path.exists():
         logging.error("Input file %s does not exist.", path)
@@ -87,6 +114,16 @@ def read_urls_from_file(path: Path) -> List[str]:
         logging.warning("No URLs found in input file %s.", path)
     return urls
 
+def collect_urls(cli_urls: List[str], input_file: Optional[str], project_root: Path) -> List[str]:
+    if cli_urls:
+        return cli_urls
+    if input_file:
+        return read_urls_from_file(Path(input_file))
+
+    default_input = project_root / "data" / "sample_input.txt"
+    logging.info("No URLs provided. Reading from default input file %s", default_input)
+    return read_urls_from_file(default_input)
+
 def configure_logging(level_name: Optional[str] = None) -> None:
     level = logging.INFO
     if level_name:
@@ -132,6 +169,21 @@ def parse_args() -> argparse.Namespace:
         "-o",
         help="Path to the output file. If not provided, a default under ./data is used.",
     )
+    parser.add_argument(
+        "--snapshot-dir",
+        help="Directory of an engagement snapshot store. When set (here or via "
+             "snapshot_dir in settings.json), each scrape's counters are appended to it.",
+    )
+    parser.add_argument(
+        "--shard",
+        help="Only scrape the URLs hashed to shard i of N, given as i/N with zero-based i "
+             "(e.g. 0/4). Run one process per shard and combine the outputs with 'merge'.",
+    )
+    parser.add_argument(
+        "--endpoint",
+        help="Profile timeline endpoint to fetch from. Falls back to profile_endpoint in "
+             "settings.json, then to Twitter's public syndication endpoint.",
+    )
     parser.add_argument(
         "--log-level",
         help="Logging level (DEBUG, INFO, WARNING, ERROR). "
@@ -139,11 +191,317 @@ def parse_args() -> argparse.Namespace:
     )
     return parser.parse_args()
 
+def parse_report_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="main.py report",
+        description="Summarize engagement over one or more JSON exports.",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="JSON export files to analyze. If omitted, the configured default output is used.",
+    )
+    parser.add_argument(
+        "--by",
+        "-b",
+        choices=["profile", "day"],
+        default="profile",
+        help="Group tweets per source profile or per UTC day (default: profile).",
+    )
+    parser.add_argument(
+        "--percentile",
+        "-p",
+        type=float,
+        default=90.0,
+        help="Upper percentile reported next to the median (default: 90).",
+    )
+    parser.add_argument(
+        "--window",
+        "-w",
+        type=int,
+        default=7,
+        help="Rolling window in days for the per-day report (default: 7).",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="Optional path to also write the summary table as CSV.",
+    )
+    parser.add_argument(
+        "--log-level",
+        help="Logging level (DEBUG, INFO, WARNING, ERROR). "
+             "If not set, falls back to config or INFO.",
+    )
+    args = parser.parse_args(argv)
+    if not 0 <= args.percentile <= 100:
+        parser.error("--percentile must be between 0 and 100")
+    if args.window < 1:
+        parser.error("--window must be at least 1")
+    return args
+
+def report_main(argv: List[str], project_root: Path, settings: dict) -> None:
+    cli_args = parse_report_args(argv)
+    configure_logging(cli_args.log_level or settings.get("log_level") or "INFO")
+
+    if cli_args.inputs:
+        inputs = [Path(p).expanduser().resolve() for p in cli_args.inputs]
+    else:
+        inputs = [resolve_output_path(None, "json", project_root, settings)]
+        logging.info("No inputs provided. Reading default export %s", inputs[0])
+
+    missing = [p for p in inputs if not p.exists()]
+    if missing:
+        logging.error("Input file(s) not found: %s", ", ".join(str(p) for p in missing))
+        return
+
+    output_path = Path(cli_args.output).expanduser().resolve() if cli_args.output else None
+    try:
+        table = run_report(inputs, cli_args.by, cli_args.percentile, cli_args.window, output_path)
+    except Exception as exc:
+        logging.exception("Failed to build report: %s", exc)
+        return
+
+    print(table)
+
+def parse_history_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="main.py history",
+        description="Show the engagement history recorded for one tweet.",
+    )
+    parser.add_argument("tweet_id", help="Numeric tweet id (id_str in the JSON export).")
+    parser.add_argument(
+        "--snapshot-dir",
+        help="Directory of the snapshot store. Falls back to snapshot_dir in settings.json.",
+    )
+    parser.add_argument(
+        "--log-level",
+        help="Logging level (DEBUG, INFO, WARNING, ERROR). "
+             "If not set, falls back to config or INFO.",
+    )
+    args = parser.parse_args(argv)
+    if not args.tweet_id.isdigit():
+        parser.error("tweet_id must be numeric")
+    if int(args.tweet_id) >= 2 ** 64:
+        parser.error("tweet_id is too large")
+    return args
+
+def history_main(argv: List[str], project_root: Path, settings: dict) -> None:
+    cli_args = parse_history_args(argv)
+    configure_logging(cli_args.log_level or settings.get("log_level") or "INFO")
+
+    snapshot_dir = resolve_snapshot_dir(cli_args.snapshot_dir, project_root, settings)
+    if snapshot_dir is None or not snapshot_dir.exists():
+        logging.error("No snapshot store found. Pass --snapshot-dir or set snapshot_dir in settings.json.")
+        return
+
+    try:
+        history = SnapshotStore(snapshot_dir).history(int(cli_args.tweet_id))
+    except Exception as exc:
+        logging.exception("Failed to read engagement history: %s", exc)
+        return
+
+    if not len(history):
+        logging.warning("No snapshots recorded for tweet %s.", cli_args.tweet_id)
+        return
+
+    columns = ["scraped_at", "favorite_count", "retweet_count", "reply_count", "bookmark_count", "views_count"]
+    print(format_table(history.to_rows(), columns))
+
+def parse_enqueue_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="main.py enqueue",
+        description="Add Twitter profile URLs to a shared work queue for 'worker' processes.",
+    )
+    parser.add_argument(
+        "urls",
+        nargs="*",
+        help="Twitter profile URLs. If omitted, --input-file is used, or data/sample_input.txt by default.",
+    )
+    parser.add_argument(
+        "--input-file",
+        "-i",
+        help="Path to a text file containing one Twitter URL per line.",
+    )
+    parser.add_argument("--queue", "-q", required=True, help="Path to the SQLite queue file.")
+    parser.add_argument(
+        "--requeue",
+        action="store_true",
+        help="Reset profiles that are already done or failed to pending, to scrape them again "
+             "with the same queue file.",
+    )
+    parser.add_argument(
+        "--log-level",
+        help="Logging level (DEBUG, INFO, WARNING, ERROR). "
+             "If not set, falls back to config or INFO.",
+    )
+    return parser.parse_args(argv)
+
+def enqueue_main(argv: List[str], project_root: Path, settings: dict) -> None:
+    cli_args = parse_enqueue_args(argv)
+    configure_logging(cli_args.log_level or settings.get("log_level") or "INFO")
+
+    urls = collect_urls(cli_args.urls, cli_args.input_file, project_root)
+    if not urls:
+        logging.error("No valid Twitter URLs supplied. Exiting.")
+        return
+
+    with WorkQueue(Path(cli_args.queue).expanduser().resolve()) as queue:
+        queue.enqueue(urls, requeue=cli_args.requeue)
+        logging.info("Queue status: %s", queue.counts())
+
+def parse_worker_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="main.py worker",
+        description="Scrape profiles from a shared work queue until it is drained.",
+    )
+    parser.add_argument("--queue", "-q", required=True, help="Path to the SQLite queue file.")
+    parser.add_argument(
+        "--output-dir",
+        "-d",
+        required=True,
+        help="Directory for per-profile JSON results (one <handle>.json per profile).",
+    )
+    parser.add_argument(
+        "--since-date",
+        "-s",
+        help="Only include tweets created on or after this date. "
+             "Examples: 2024-03-05 or 2024-03-05T00:00:00.",
+    )
+    parser.add_argument(
+        "--endpoint",
+        help="Profile timeline endpoint to fetch from. Falls back to profile_endpoint in "
+             "settings.json, then to Twitter's public syndication endpoint.",
+    )
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=300.0,
+        help="Seconds a claimed profile stays leased before other workers may retry it (default: 300).",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="Attempts per profile before it is marked failed (default: 3).",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=2.0,
+        help="Seconds to wait between claims while other workers hold the remaining leases (default: 2).",
+    )
+    parser.add_argument(
+        "--snapshot-dir",
+        help="Directory of an engagement snapshot store shared by the workers. When set (here or via "
+             "snapshot_dir in settings.json), each profile's counters are appended to it.",
+    )
+    parser.add_argument(
+        "--log-level",
+        help="Logging level (DEBUG, INFO, WARNING, ERROR). "
+             "If not set, falls back to config or INFO.",
+    )
+    args = parser.parse_args(argv)
+    if args.lease <= 0:
+        parser.error("--lease must be greater than 0")
+    if args.max_attempts < 1:
+        parser.error("--max-attempts must be at least 1")
+    return args
+
+def worker_main(argv: List[str], project_root: Path, settings: dict) -> None:
+    cli_args = parse_worker_args(argv)
+    configure_logging(cli_args.log_level or settings.get("log_level") or "INFO")
+
+    since_dt = resolve_since_date(cli_args.since_date, settings)
+    endpoint = resolve_endpoint(cli_args.endpoint, settings)
+    output_dir = Path(cli_args.output_dir).expanduser().resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    queue_path = Path(cli_args.queue).expanduser().resolve()
+    with WorkQueue(queue_path, cli_args.lease, cli_args.max_attempts) as queue:
+        run_worker(
+            queue,
+            output_dir,
+            since_dt,
+            endpoint,
+            poll_interval=cli_args.poll_interval,
+            snapshot_dir=resolve_snapshot_dir(cli_args.snapshot_dir, project_root, settings),
+        )
+        counts = queue.counts()
+
+    logging.info("Queue status: %s", counts)
+    if counts["failed"]:
+        logging.warning("%d profile(s) failed permanently.", counts["failed"])
+
+def parse_merge_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="main.py merge",
+        description="Combine per-shard JSON exports into one reverse-chronological export.",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="JSON exports to merge. Directories are expanded to the *.json files they contain.",
+    )
+    parser.add_argument(
+        "--format",
+        "-f",
+        choices=["json", "csv", "excel", "xml", "html"],
+        help="Export format for the merged tweets (default: json).",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="Path to the output file. If not provided, a default under ./data is used.",
+    )
+    parser.add_argument(
+        "--log-level",
+        help="Logging level (DEBUG, INFO, WARNING, ERROR). "
+             "If not set, falls back to config or INFO.",
+    )
+    return parser.parse_args(argv)
+
+def merge_main(argv: List[str], project_root: Path, settings: dict) -> None:
+    cli_args = parse_merge_args(argv)
+    configure_logging(cli_args.log_level or settings.get("log_level") or "INFO")
+
+    inputs = [Path(p).expanduser().resolve() for p in cli_args.inputs]
+    missing = [p for p in inputs if not p.exists()]
+    if missing:
+        logging.error("Input path(s) not found: %s", ", ".join(str(p) for p in missing))
+        return
+
+    export_format = resolve_export_format(cli_args.format, settings)
+    output_path = resolve_output_path(cli_args.output, export_format, project_root, settings)
+    try:
+        if export_format == "json":
+            # JSON is written as the merge produces it, without holding every tweet in memory.
+            export_json_stream(iter_merged(expand_merge_inputs(inputs)), output_path)
+        else:
+            export_data(merge_exports(inputs), export_format, output_path)
+    except Exception as exc:
+        logging.exception("Failed to merge exports: %s", exc)
+        return
+
+    logging.info("Export completed successfully: %s", output_path)
+
+SUBCOMMANDS = {
+    "report": report_main,
+    "history": history_main,
+    "enqueue": enqueue_main,
+    "worker": worker_main,
+    "merge": merge_main,
+}
+
 def main() -> None:
     project_root = Path(__file__).resolve().parent.parent
     config_path = project_root / "src" / "config" / "settings.json"
     settings = load_settings(config_path)
 
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command in SUBCOMMANDS:
+        SUBCOMMANDS[command](sys.argv[2:], project_root, settings)
+        return
+
     cli_args = parse_args()
 
     log_level = cli_args.log_level or settings.get("log_level") or "INFO"
@@ -156,26 +514,25 @@ def main() -> None:
     export_format = resolve_export_format(cli_args.format, settings)
     logging.info("Using export format: %s", export_format)
 
-    urls: List[str] = []
-    if cli_args.urls:
-        urls = cli_args.urls
-    else:
-        input_file = cli_args.input_file
-        if input_file:
-            urls = read_urls_from_file(Path(input_file))
-        else:
-            default_input = project_root / "data" / "sample_input.txt"
-            logging.info("No URLs provided. Reading from default input file %s", default_input)
-            urls = read_urls_from_file(default_input)
-
+    urls = collect_urls(cli_args.urls, cli_args.input_file, project_root)
     if not urls:
         logging.error("No valid Twitter URLs supplied. Exiting.")
         return
 
+    if cli_args.shard:
+        try:
+            shard_index, shard_total = parse_shard_spec(cli_args.shard)
+        except ValueError as exc:
+            logging.error("%s", exc)
+            return
+        urls = filter_urls_for_shard(urls, shard_index, shard_total)
+        if not urls:
+            logging.warning("No URLs hashed to shard %s. Nothing to scrape.", cli_args.shard)
+
     logging.info("Starting scrape for %d URL(s).", len(urls))
 
     try:
-        tweets = scrape_tweets_for_urls(urls, since_dt)
+        tweets = scrape_tweets_for_urls(urls, since_dt, resolve_endpoint(cli_args.endpoint, settings))
     except Exception as exc:
         logging.exception("Unhandled error while scraping tweets: %s", exc)
         return
@@ -194,5 +551,13 @@ def main() -> None:
 
     logging.info("Export completed successfully: %s", output_path)
 
+    snapshot_dir = resolve_snapshot_dir(cli_args.snapshot_dir, project_root, settings)
+    if snapshot_dir is not None and tweets:
+        try:
+            # Stamped when the store lock is taken, so shards finishing in any order stay chronological.
+            SnapshotStore(snapshot_dir).append(tweets)
+        except Exception as exc:
+            logging.exception("Failed to record engagement snapshot: %s", exc)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
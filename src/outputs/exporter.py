@@ -1,6 +1,7 @@
-thonimport csv
+import csv
 import json
 import logging
+import os
 from pathlib import Path
 from typing import Any, Dict, Iterable, List
 
@@ -18,6 +19,7 @@ def _flatten_for_tabular(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]
         flat_row = {
             "bookmark_count": row.get("bookmark_count"),
             "created_at": row.get("created_at"),
+            "id_str": row.get("id_str"),
             "conversation_id_str": row.get("conversation_id_str"),
             "favorite_count": row.get("favorite_count"),
             "full_text": row.get("full_text"),
@@ -38,6 +40,25 @@ def _export_json(data: List[Dict[str, Any]], output_path: Path) -> None:
         json.dump(data, f, ensure_ascii=False, indent=2)
     logger.info("Exported %d tweet(s) to JSON: %s", len(data), output_path)
 
+def export_json_stream(rows: Iterable[Dict[str, Any]], output_path: Path) -> int:
+    """
+    Write rows to a JSON array as they arrive, in the same layout as the
+    JSON export. The file is written under a temporary name and only moved
+    into place once complete. Returns the number of rows written.
+    """
+    _ensure_parent_dir(output_path)
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    count = 0
+    with tmp_path.open("w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(",\n  " if count else "[\n  ")
+            f.write(json.dumps(row, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+            count += 1
+        f.write("\n]" if count else "[]")
+    os.replace(tmp_path, output_path)
+    logger.info("Exported %d tweet(s) to JSON: %s", count, output_path)
+    return count
+
 def _export_csv(data: List[Dict[str, Any]], output_path: Path) -> None:
     _ensure_parent_dir(output_path)
     flattened = _flatten_for_tabular(data)
@@ -46,6 +67,7 @@ def _export_csv(data: List[Dict[str, Any]], output_path: Path) -> None:
         headers = [
             "bookmark_count",
             "created_at",
+            "id_str",
             "conversation_id_str",
             "favorite_count",
             "full_text",
@@ -89,6 +111,7 @@ def _export_xml(data: List[Dict[str, Any]], output_path: Path) -> None:
         for key in (
             "bookmark_count",
             "created_at",
+            "id_str",
             "conversation_id_str",
             "favorite_count",
             "full_text",
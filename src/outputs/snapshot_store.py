@@ -0,0 +1,533 @@
+import json
+import logging
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from io import BytesIO
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+STORE_VERSION = 2
+
+COUNTER_FIELDS = ("favorite_count", "retweet_count", "reply_count", "bookmark_count", "views_count")
+
+# Largest absolute value accepted per counter. Deltas of views stay clear of
+# int64 overflow when zigzag-encoded.
+_COUNTER_LIMITS = {name: 2 ** 32 - 1 for name in COUNTER_FIELDS[:-1]}
+_COUNTER_LIMITS["views_count"] = 2 ** 62 - 1
+
+# A tweet's first sample in each segment is a keyframe holding its absolute
+# counters; every other sample stores the change since that tweet's previous
+# sample. Range scans decode from the start of a segment, so this bounds
+# their extra work.
+SEGMENT_ROWS = 1_000_000
+
+_KEYFRAME_DTYPE = np.dtype(
+    [("row", "<u8")]
+    + [(name, "<u4") for name in COUNTER_FIELDS[:-1]]
+    + [("views_count", "<u8")]
+)
+# One record per append: its rows share scraped_at, and each counter's
+# zigzag deltas use the narrowest of 1/2/4/8 bytes that fits the batch.
+_BLOCK_DTYPE = np.dtype(
+    [("row_start", "<u8"), ("rows", "<u4"), ("scraped_at", "<i8"), ("segment", "<u4")]
+    + [(f"{name}_offset", "<u8") for name in COUNTER_FIELDS]
+    + [(f"{name}_width", "u1") for name in COUNTER_FIELDS]
+)
+# Writer state, one record per tweet sorted by tweet id: its dictionary code,
+# sample count, last segment and last absolute counters.
+_STATE_DTYPE = np.dtype(
+    [("tweet_id", "<u8"), ("code", "<u4"), ("samples", "<u4"), ("segment", "<i8")]
+    + [(name, "<i8") for name in COUNTER_FIELDS]
+)
+_CODE_DTYPE = np.dtype("<u4")
+_ORDER_DTYPE = np.dtype("<u4")
+_MAX_ROWS = 2 ** 32 - 1
+
+FLAG_VIEWS_MISSING = 0x01
+
+_META_FILE = "meta.json"
+_LOCK_FILE = ".lock"
+_BLOCKS_FILE = "blocks.bin"
+_CODES_FILE = "codes.bin"
+_FLAGS_FILE = "flags.bin"
+_KEYFRAMES_FILE = "keyframes.bin"
+
+@dataclass
+class EngagementHistory:
+    """
+    Absolute counter samples, one entry per (tweet, scrape).
+
+    ``scraped_at`` is in UTC epoch seconds. ``views_count`` is NaN for
+    samples where the scrape did not report views.
+    """
+    tweet_id: np.ndarray
+    scraped_at: np.ndarray
+    favorite_count: np.ndarray
+    retweet_count: np.ndarray
+    reply_count: np.ndarray
+    bookmark_count: np.ndarray
+    views_count: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.tweet_id.shape[0])
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        for i in range(len(self)):
+            views = self.views_count[i]
+            rows.append({
+                "tweet_id": str(self.tweet_id[i]),
+                "scraped_at": datetime.fromtimestamp(int(self.scraped_at[i]), tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+                "favorite_count": int(self.favorite_count[i]),
+                "retweet_count": int(self.retweet_count[i]),
+                "reply_count": int(self.reply_count[i]),
+                "bookmark_count": int(self.bookmark_count[i]),
+                "views_count": None if np.isnan(views) else int(views),
+            })
+        return rows
+
+def _write_atomic(path: Path, payload: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def _tweet_id(row: Dict[str, Any]) -> Optional[int]:
+    # conversation_id_str is shared by a whole thread, so it is not a fallback.
+    value = row.get("id_str") or row.get("id")
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value if 0 <= value < 2 ** 64 else None
+    if isinstance(value, str) and value.isdigit():
+        tweet_id = int(value)
+        return tweet_id if tweet_id < 2 ** 64 else None
+    return None
+
+def _counter(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    return (values >> np.uint64(1)).astype(np.int64) ^ -(values & np.uint64(1)).astype(np.int64)
+
+def _byte_width(values: np.ndarray) -> int:
+    top = int(values.max()) if values.size else 0
+    for width in (1, 2, 4):
+        if top < 1 << (8 * width):
+            return width
+    return 8
+
+def _read_packed(raw: np.ndarray, offsets: np.ndarray, widths: np.ndarray) -> np.ndarray:
+    """Little-endian unsigned integers of mixed byte widths at the given offsets."""
+    out = np.zeros(offsets.shape[0], dtype=np.uint64)
+    for width in np.unique(widths):
+        mask = widths == width
+        shifts = np.arange(width, dtype=np.uint64) * np.uint64(8)
+        parts = raw[offsets[mask][:, None] + np.arange(width)].astype(np.uint64) << shifts
+        out[mask] = np.bitwise_or.reduce(parts, axis=1)
+    return out
+
+def _lock_file(f: IO[bytes]) -> None:
+    # Imported here so the CLI still loads on platforms without fcntl.
+    if os.name == "nt":
+        import msvcrt
+
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after ten seconds; keep waiting for the writer.
+                continue
+    else:
+        import fcntl
+
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+def _unlock_file(f: IO[bytes]) -> None:
+    if os.name == "nt":
+        import msvcrt
+
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def _empty_history() -> EngagementHistory:
+    empty = np.empty(0, dtype=np.int64)
+    return EngagementHistory(
+        tweet_id=np.empty(0, dtype=np.uint64),
+        scraped_at=empty,
+        favorite_count=empty,
+        retweet_count=empty,
+        reply_count=empty,
+        bookmark_count=empty,
+        views_count=np.empty(0, dtype=np.float64),
+    )
+
+class SnapshotStore:
+    """
+    Append-only, columnar store of engagement counters across repeated scrapes.
+
+    Layout of the store directory:
+
+    - ``blocks.bin``: one record per append with its first row, row count,
+      ``scraped_at``, segment and the byte offset and width of its deltas
+    - ``<counter>.delta``: zigzag-encoded per-tweet deltas, packed per block
+    - ``keyframes.bin``: absolute counters for each tweet's first sample in
+      a segment, keyed by row
+    - ``codes.bin`` / ``flags.bin``: per-row tweet dictionary code and flags
+    - ``tweets.<gen>.npy``: tweet id to code, sample count and last counters
+    - ``order.<gen>.bin``: rows sorted by tweet code, then append order
+    - ``meta.json``: format version, committed counts and current generation
+    - ``.lock``: lock file serializing writers
+
+    Appends hold an exclusive lock, re-read ``meta.json``, drop any tail an
+    interrupted append left behind and merge the new rows into the index.
+    Nothing is visible until ``meta.json`` is replaced. Reads never take
+    the lock or write to the store; they use the generation named in
+    ``meta.json``, whose files writers keep until the next commit.
+    """
+
+    def __init__(self, path: Path, segment_rows: int = SEGMENT_ROWS) -> None:
+        self.path = Path(path)
+        self.segment_rows = segment_rows
+        self._meta = self._load_meta()
+
+    def __len__(self) -> int:
+        return int(self._meta["rows"])
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with (self.path / _LOCK_FILE).open("a+b") as f:
+            _lock_file(f)
+            try:
+                yield
+            finally:
+                _unlock_file(f)
+
+    def _load_meta(self) -> Dict[str, Any]:
+        meta_path = self.path / _META_FILE
+        if not meta_path.exists():
+            return {"version": STORE_VERSION, "rows": 0, "blocks": 0, "keyframes": 0, "generation": 0}
+        with meta_path.open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported snapshot store version in {meta_path}: {meta.get('version')}")
+        return meta
+
+    def refresh(self) -> None:
+        """Pick up rows committed by other writers since this store was opened."""
+        self._meta = self._load_meta()
+
+    def _read_consistent(self, read: Callable[[], T]) -> T:
+        # A reader two commits behind may find its generation's files removed.
+        try:
+            return read()
+        except FileNotFoundError:
+            self.refresh()
+            return read()
+
+    def _memmap(self, name: str, dtype: np.dtype, count: int) -> np.ndarray:
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self.path / name, dtype=dtype, mode="r", shape=(count,))
+
+    def _blocks(self) -> np.ndarray:
+        return self._memmap(_BLOCKS_FILE, _BLOCK_DTYPE, int(self._meta["blocks"]))
+
+    def _keyframes(self) -> np.ndarray:
+        return self._memmap(_KEYFRAMES_FILE, _KEYFRAME_DTYPE, int(self._meta["keyframes"]))
+
+    def _state(self) -> np.ndarray:
+        if self._meta["generation"] == 0:
+            return np.empty(0, dtype=_STATE_DTYPE)
+        return np.load(self.path / f"tweets.{self._meta['generation']}.npy", mmap_mode="r")
+
+    def _order(self) -> np.ndarray:
+        return self._memmap(f"order.{self._meta['generation']}.bin", _ORDER_DTYPE, len(self))
+
+    def _delta_sizes(self, blocks: np.ndarray) -> Dict[str, int]:
+        if blocks.size == 0:
+            return {name: 0 for name in COUNTER_FIELDS}
+        last = blocks[-1]
+        return {
+            name: int(last[f"{name}_offset"]) + int(last["rows"]) * int(last[f"{name}_width"])
+            for name in COUNTER_FIELDS
+        }
+
+    def _recover(self) -> Dict[str, int]:
+        """
+        Drop bytes an interrupted append left past the committed data.
+
+        Caller holds the lock. Returns the committed size of each delta file.
+        """
+        delta_sizes = self._delta_sizes(self._blocks())
+        expected = {
+            _BLOCKS_FILE: int(self._meta["blocks"]) * _BLOCK_DTYPE.itemsize,
+            _CODES_FILE: len(self) * _CODE_DTYPE.itemsize,
+            _FLAGS_FILE: len(self),
+            _KEYFRAMES_FILE: int(self._meta["keyframes"]) * _KEYFRAME_DTYPE.itemsize,
+        }
+        expected.update({f"{name}.delta": size for name, size in delta_sizes.items()})
+
+        for name, size in expected.items():
+            file_path = self.path / name
+            actual = file_path.stat().st_size if file_path.exists() else 0
+            if actual < size:
+                raise ValueError(f"Snapshot file {file_path} is shorter than its committed size.")
+            if actual > size:
+                logger.warning("Discarding uncommitted data in %s", file_path)
+                with file_path.open("r+b") as f:
+                    f.truncate(size)
+        return delta_sizes
+
+    def _history_from_rows(self, rows: np.ndarray, skip: int = 0) -> EngagementHistory:
+        """
+        Absolute samples for ``rows`` (ascending), dropping the first ``skip``.
+
+        Each tweet's first row in ``rows`` must be a keyframe.
+        """
+        n = rows.shape[0]
+        if n == skip:
+            return _empty_history()
+
+        blocks = self._blocks()
+        b = np.searchsorted(blocks["row_start"], rows, side="right") - 1
+        within = rows - blocks["row_start"][b].astype(np.int64)
+
+        keyframes = self._keyframes()
+        k = np.searchsorted(keyframes["row"], rows)
+        is_key = k < keyframes.shape[0]
+        is_key[is_key] = keyframes["row"][k[is_key]] == rows[is_key]
+
+        codes = self._memmap(_CODES_FILE, _CODE_DTYPE, len(self))[rows]
+        # Group rows by tweet; keyframes restart each tweet's running sum.
+        group = np.argsort(codes, kind="stable")
+        starts = np.maximum.accumulate(np.where(is_key[group], np.arange(n), 0))
+
+        delta_sizes = self._delta_sizes(blocks)
+        counters: Dict[str, np.ndarray] = {}
+        for name in COUNTER_FIELDS:
+            raw = self._memmap(f"{name}.delta", np.dtype("u1"), delta_sizes[name])
+            widths = blocks[f"{name}_width"][b].astype(np.int64)
+            offsets = blocks[f"{name}_offset"][b].astype(np.int64) + within * widths
+            values = _unzigzag(_read_packed(raw, offsets, widths))
+            values[is_key] = keyframes[name][k[is_key]]
+
+            grouped = values[group]
+            running = np.cumsum(grouped)
+            absolute = np.empty(n, dtype=np.int64)
+            absolute[group] = running - running[starts] + grouped[starts]
+            counters[name] = absolute[skip:]
+
+        state = self._state()
+        ids_by_code = np.empty(state.shape[0], dtype=np.uint64)
+        ids_by_code[state["code"]] = state["tweet_id"]
+        views = counters.pop("views_count").astype(np.float64)
+        flags = self._memmap(_FLAGS_FILE, np.dtype("u1"), len(self))[rows[skip:]]
+        views[(flags & FLAG_VIEWS_MISSING) != 0] = np.nan
+        return EngagementHistory(
+            tweet_id=ids_by_code[codes[skip:]],
+            scraped_at=blocks["scraped_at"][b[skip:]].astype(np.int64),
+            views_count=views,
+            **counters,
+        )
+
+    def append(self, tweets: Iterable[Dict[str, Any]], scraped_at: Optional[datetime] = None) -> int:
+        """
+        Record one scrape's counters for every tweet that carries a numeric id.
+
+        Scrapes must be appended in chronological order. Without
+        ``scraped_at`` the samples are stamped with the current time while
+        the lock is held (never earlier than the newest sample), so
+        concurrent scrapes sharing a store cannot append out of order.
+        Returns the number of samples written.
+        """
+        batch: Dict[int, List[Optional[int]]] = {}
+        for row in tweets:
+            tweet_id = _tweet_id(row)
+            if tweet_id is None:
+                continue
+            batch[tweet_id] = [_counter(row.get(name)) for name in COUNTER_FIELDS]
+        if not batch:
+            return 0
+
+        n = len(batch)
+        ids = np.array(sorted(batch), dtype=np.uint64)
+        views_missing = np.array([batch[i][-1] is None for i in ids.tolist()], dtype=bool)
+        values = np.array([[c or 0 for c in batch[i]] for i in ids.tolist()], dtype=np.int64)
+        for j, name in enumerate(COUNTER_FIELDS):
+            if values[:, j].min() < 0 or values[:, j].max() > _COUNTER_LIMITS[name]:
+                raise ValueError(f"{name} value does not fit the snapshot store.")
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            self.refresh()
+            delta_sizes = self._recover()
+            rows = len(self)
+            if rows + n > _MAX_ROWS:
+                raise ValueError("Snapshot store is full.")
+
+            blocks = self._blocks()
+            last = int(blocks["scraped_at"][-1]) if blocks.size else 0
+            if scraped_at is None:
+                ts = max(int(datetime.now(timezone.utc).timestamp()), last)
+            else:
+                ts = int(scraped_at.timestamp())
+                if ts < last:
+                    raise ValueError("Snapshots must be appended in chronological order.")
+
+            segment = 0
+            if blocks.size:
+                segment = int(blocks["segment"][-1])
+                first = int(np.searchsorted(blocks["segment"], segment, side="left"))
+                if rows - int(blocks["row_start"][first]) >= self.segment_rows:
+                    segment += 1
+
+            state = np.array(self._state())
+            order = np.array(self._order())
+            pos = np.searchsorted(state["tweet_id"], ids)
+            known = pos < state.shape[0]
+            known[known] = state["tweet_id"][pos[known]] == ids[known]
+
+            prev = np.zeros((n, len(COUNTER_FIELDS)), dtype=np.int64)
+            for j, name in enumerate(COUNTER_FIELDS):
+                prev[known, j] = state[name][pos[known]]
+            # Missing views carry the last known value forward.
+            values[:, -1] = np.where(views_missing, prev[:, -1], values[:, -1])
+            keyframe = ~known
+            keyframe[known] = state["segment"][pos[known]] != segment
+
+            codes = np.empty(n, dtype=np.int64)
+            codes[known] = state["code"][pos[known]]
+            codes[~known] = state.shape[0] + np.arange(int((~known).sum()))
+
+            # Rows within a block are in code order, so they merge into the index in place.
+            by_code = np.argsort(codes, kind="stable")
+            ids, values, prev, codes = ids[by_code], values[by_code], prev[by_code], codes[by_code]
+            views_missing, keyframe = views_missing[by_code], keyframe[by_code]
+            pos, known = pos[by_code], known[by_code]
+            new_rows = rows + np.arange(n)
+
+            deltas = values - prev
+            deltas[keyframe] = 0
+            block = np.zeros(1, dtype=_BLOCK_DTYPE)
+            block["row_start"], block["rows"], block["scraped_at"], block["segment"] = rows, n, ts, segment
+            packed: Dict[str, bytes] = {}
+            for j, name in enumerate(COUNTER_FIELDS):
+                zigzag = _zigzag(deltas[:, j])
+                width = _byte_width(zigzag)
+                block[f"{name}_offset"], block[f"{name}_width"] = delta_sizes[name], width
+                packed[f"{name}.delta"] = zigzag.astype(f"<u{width}").tobytes()
+
+            keys = np.zeros(int(keyframe.sum()), dtype=_KEYFRAME_DTYPE)
+            keys["row"] = new_rows[keyframe]
+            for j, name in enumerate(COUNTER_FIELDS):
+                keys[name] = values[keyframe, j]
+
+            packed[_CODES_FILE] = codes.astype(_CODE_DTYPE).tobytes()
+            packed[_FLAGS_FILE] = np.where(views_missing, FLAG_VIEWS_MISSING, 0).astype("u1").tobytes()
+            packed[_KEYFRAMES_FILE] = keys.tobytes()
+            packed[_BLOCKS_FILE] = block.tobytes()
+            for name, payload in packed.items():
+                with (self.path / name).open("ab") as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            # Each known tweet's new row goes after its existing rows in the index.
+            samples_by_code = np.zeros(state.shape[0], dtype=np.int64)
+            samples_by_code[state["code"]] = state["samples"]
+            ends = np.cumsum(samples_by_code)
+            insert_at = np.full(n, order.shape[0], dtype=np.int64)
+            insert_at[known] = ends[codes[known]]
+            order = np.insert(order, insert_at, new_rows.astype(_ORDER_DTYPE))
+
+            kp = pos[known]
+            state["samples"][kp] += 1
+            state["segment"][kp] = segment
+            added = np.zeros(int((~known).sum()), dtype=_STATE_DTYPE)
+            added["tweet_id"], added["code"], added["samples"], added["segment"] = ids[~known], codes[~known], 1, segment
+            for j, name in enumerate(COUNTER_FIELDS):
+                state[name][kp] = values[known, j]
+                added[name] = values[~known, j]
+            # New ids are sorted, so inserting at their search positions keeps the state sorted.
+            state = np.insert(state, pos[~known], added)
+
+            generation = int(self._meta["generation"]) + 1
+            buf = BytesIO()
+            np.save(buf, state)
+            _write_atomic(self.path / f"tweets.{generation}.npy", buf.getvalue())
+            _write_atomic(self.path / f"order.{generation}.bin", order.tobytes())
+
+            self._meta.update({
+                "rows": rows + n,
+                "blocks": int(self._meta["blocks"]) + 1,
+                "keyframes": int(self._meta["keyframes"]) + keys.shape[0],
+                "generation": generation,
+            })
+            _write_atomic(self.path / _META_FILE, json.dumps(self._meta).encode("utf-8"))
+            # Keep the previous generation for readers that loaded meta.json just before this commit.
+            for stale in (f"tweets.{generation - 2}.npy", f"order.{generation - 2}.bin"):
+                try:
+                    (self.path / stale).unlink()
+                except FileNotFoundError:
+                    pass
+
+        logger.info("Appended %d engagement sample(s) to %s", n, self.path)
+        return n
+
+    def history(self, tweet_id: int) -> EngagementHistory:
+        """All samples for one tweet, oldest first."""
+        def read() -> EngagementHistory:
+            self.refresh()
+            state = self._state()
+            i = int(np.searchsorted(state["tweet_id"], np.uint64(tweet_id)))
+            if i == state.shape[0] or int(state["tweet_id"][i]) != tweet_id:
+                return _empty_history()
+            code = state["code"][i]
+            start = int(state["samples"][state["code"] < code].sum())
+            rows = np.asarray(self._order()[start:start + int(state["samples"][i])], dtype=np.int64)
+            return self._history_from_rows(rows)
+
+        return self._read_consistent(read)
+
+    def scan(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> EngagementHistory:
+        """All samples scraped in ``[start, end)``, in append order."""
+        def read() -> EngagementHistory:
+            self.refresh()
+            blocks = self._blocks()
+            scraped = blocks["scraped_at"]
+            lo = 0 if start is None else int(np.searchsorted(scraped, int(start.timestamp()), side="left"))
+            hi = blocks.shape[0] if end is None else int(np.searchsorted(scraped, int(end.timestamp()), side="left"))
+            if lo >= hi:
+                return _empty_history()
+            # Decode from the segment start so every tweet begins at a keyframe.
+            first = int(np.searchsorted(blocks["segment"], blocks["segment"][lo], side="left"))
+            first_row = int(blocks["row_start"][first])
+            end_row = int(blocks["row_start"][hi - 1]) + int(blocks["rows"][hi - 1])
+            rows = np.arange(first_row, end_row, dtype=np.int64)
+            return self._history_from_rows(rows, skip=int(blocks["row_start"][lo]) - first_row)
+
+        return self._read_consistent(read)